@@ -5,7 +5,6 @@ Day 7: Full dashboard with metrics, drift monitoring, and live tester.
 
 import streamlit as st
 import pandas as pd
-import json
 import config
 from pathlib import Path
 
@@ -16,16 +15,30 @@ st.set_page_config(
 )
 
 # ── Helpers ───────────────────────────────────────────────────────────────
-def load_eval_log():
-    log_path = Path("logs/eval_runs/eval_log.jsonl")
-    if not log_path.exists():
-        return pd.DataFrame()
-    rows = [json.loads(l) for l in log_path.read_text().strip().splitlines()]
-    return pd.DataFrame(rows)
-
-def load_taxonomy():
-    with open("policy/reason_codes.json") as f:
-        return json.load(f)
+@st.cache_resource
+def get_run_store():
+    from src.run_store import RunHistoryStore
+    return RunHistoryStore()
+
+@st.cache_data
+def load_latest_runs(dataset: str, log_offset: int) -> pd.DataFrame:
+    # log_offset is part of the cache key: results refresh only when the log grows
+    return pd.DataFrame(get_run_store().latest(dataset))
+
+@st.cache_resource
+def get_registry():
+    # One warm Agent per (prompt version, provider, model) for the whole server process;
+    # templates and the taxonomy hot-reload when their files change
+    from src.registry import AgentRegistry
+    return AgentRegistry()
+
+@st.cache_data
+def load_drift_report(state_mtime_ns: int) -> dict:
+    # state_mtime_ns is part of the cache key: re-read only when the service saves new state
+    from src.drift_monitor import DriftMonitor
+    return DriftMonitor.load(config.DRIFT_STATE_PATH).report()
+
+log_offset = get_run_store().sync()
 
 # ── Header ────────────────────────────────────────────────────────────────
 st.title("🛡️ LLM Risk Evaluation Agent")
@@ -47,23 +60,16 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs([
 # ── Tab 1: Metrics Dashboard ──────────────────────────────────────────────
 with tab1:
     st.header("Prompt Version Comparison")
-    df = load_eval_log()
+    latest_gold = load_latest_runs("gold", log_offset)
 
-    if df.empty:
+    if log_offset == 0:
         st.warning("No evaluation runs found.")
     else:
-        gold_df = df[df["dataset"] == "gold"].copy()
-        if not gold_df.empty:
+        if not latest_gold.empty:
             st.subheader("Gold Dataset Results")
             display_cols = ["prompt_version", "precision", "recall", "f1",
                           "high_severity_recall", "high_severity_fn_count",
                           "parse_error_count", "p50_latency_ms", "p95_latency_ms"]
-            latest_gold = (
-                gold_df.sort_values("timestamp")
-                       .groupby("prompt_version")
-                       .last()
-                       .reset_index()
-            )
             st.dataframe(latest_gold[display_cols], use_container_width=True)
 
             col1, col2, col3 = st.columns(3)
@@ -77,27 +83,15 @@ with tab1:
 # ── Tab 2: Drift Monitor ──────────────────────────────────────────────────
 with tab2:
     st.header("Drift Recall Monitor")
-    df = load_eval_log()
+    gold_latest = load_latest_runs("gold", log_offset)
+    drift_latest = load_latest_runs("drift", log_offset)
 
-    if df.empty:
+    if log_offset == 0:
         st.warning("No evaluation runs found.")
     else:
-        gold_df = df[df["dataset"] == "gold"][["prompt_version", "recall", "high_severity_recall", "timestamp"]].copy()
-        drift_df = df[df["dataset"] == "drift"][["prompt_version", "recall", "high_severity_recall", "timestamp"]].copy()
-
-        if not gold_df.empty and not drift_df.empty:
-            gold_latest = (
-                gold_df.sort_values("timestamp")
-                       .groupby("prompt_version")
-                       .last()
-                       .reset_index()
-            )
-            drift_latest = (
-                drift_df.sort_values("timestamp")
-                        .groupby("prompt_version")
-                        .last()
-                        .reset_index()
-            )
+        if not gold_latest.empty and not drift_latest.empty:
+            cols = ["prompt_version", "recall", "high_severity_recall", "timestamp"]
+            gold_latest, drift_latest = gold_latest[cols], drift_latest[cols]
 
             merged = gold_latest.merge(drift_latest, on="prompt_version", suffixes=("_gold", "_drift"))
             merged["recall_drop"] = (merged["recall_gold"] - merged["recall_drift"]).round(3)
@@ -118,10 +112,51 @@ with tab2:
 
             st.info("✅ v3_high_recall achieves zero high-severity FN on drift — recommended for production.")
 
+    st.header("Live Traffic Drift")
+    drift_state = Path(config.DRIFT_STATE_PATH)
+    if not drift_state.exists():
+        st.caption("No drift monitor state yet — run the classification service (python -m src.server).")
+    else:
+        report = load_drift_report(drift_state.stat().st_mtime_ns)
+        check = report["last_check"]
+        current, reference = report["current"], report["reference"]
+        st.caption(f"Current window {report['current_window_s'] / 60:.0f} min (n={current['n']}) vs "
+                   f"reference {report['reference_window_s'] / 3600:.1f} h (n={reference['n']}) — "
+                   f"status: **{check.get('status', 'no check yet')}**")
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Violation PSI", check.get("violation_psi", "—"))
+        col2.metric("Enforcement PSI", check.get("enforcement_psi", "—"))
+        col3.metric("Parse Error Rate", f"{current['parse_error_rate']:.2%}",
+                    f"{current['parse_error_rate'] - reference['parse_error_rate']:+.2%}", delta_color="inverse")
+        if current["latency"] and reference["latency"]:
+            col4.metric("p95 Latency (ms)", current["latency"]["p95"],
+                        round(current["latency"]["p95"] - reference["latency"]["p95"], 1), delta_color="inverse")
+
+        def share(counts: dict) -> pd.Series:
+            return pd.Series(counts, dtype=float) / max(1, sum(counts.values()))
+
+        st.subheader("Violation Code Share: Current vs Reference")
+        st.bar_chart(pd.DataFrame({"current": share(current["violations"]),
+                                   "reference": share(reference["violations"])}).fillna(0))
+
+        timeline = pd.DataFrame(report["timeline"])
+        if not timeline.empty:
+            timeline["start"] = pd.to_datetime(timeline["start"], unit="s")
+            st.subheader("Per-Pane Timeline")
+            st.line_chart(timeline.set_index("start")[["parse_error_rate", "action_rate"]])
+            st.line_chart(timeline.set_index("start")[["p95_latency_ms"]])
+
+        if report["alerts"]:
+            st.subheader("Alerts")
+            alerts = pd.DataFrame(report["alerts"])
+            alerts["timestamp"] = pd.to_datetime(alerts["timestamp"], unit="s")
+            st.dataframe(alerts.iloc[::-1], use_container_width=True)
+
 # ── Tab 3: Taxonomy ───────────────────────────────────────────────────────
 with tab3:
     st.header("Financial Integrity Risk Taxonomy")
-    taxonomy = load_taxonomy()
+    taxonomy = get_registry().taxonomy
 
     st.markdown(f"**Version:** {taxonomy.get('version')} | "
                 f"**Owner:** {taxonomy.get('owner')} | "
@@ -167,17 +202,14 @@ with tab4:
         elif not text_input.strip():
             st.error("Please enter content to evaluate.")
         else:
-            import os, sys
+            import os
             if provider == "anthropic":
                 os.environ["ANTHROPIC_API_KEY"] = api_key
             elif provider == "openai":
                 os.environ["OPENAI_API_KEY"] = api_key
-            sys.path.insert(0, ".")
             with st.spinner("Classifying..."):
                 try:
-                    from src.agent import Agent
-                    agent = Agent(prompt_version=prompt_version)
-                    result = agent.classify(text_input)
+                    result = get_registry().get(prompt_version).classify(text_input)
                     col1, col2, col3 = st.columns(3)
                     col1.metric("Label", "🚨 Violation" if result.label == 1 else "✅ Benign")
                     col2.metric("Severity", result.severity.upper())
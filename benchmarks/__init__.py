@@ -0,0 +1 @@
+# LLM Risk Evaluation Agent — offline benchmarks
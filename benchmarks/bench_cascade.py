@@ -0,0 +1,65 @@
+"""
+benchmarks/bench_cascade.py
+Single model vs confidence-gated cascade, on gold and drift.
+
+For one prompt version, runs the small model alone, the strong model alone,
+and the cascade at each confidence threshold, and reports recall,
+high-severity recall, escalation rate, mean latency and mean cost per item.
+Cascade runs whose high-severity recall falls below
+HIGH_SEVERITY_RECALL_THRESHOLD are flagged (the gate itself does not enforce
+the threshold). Uses the local simulated
+provider unless --live is given. The simulator answers every model the
+same way, so offline numbers exercise the gate, not model quality.
+
+Usage:
+    python -m benchmarks.bench_cascade
+    python -m benchmarks.bench_cascade --live --thresholds 0.7 0.8 0.9
+"""
+
+import argparse
+import config
+
+COLS = ["recall", "high_severity_recall", "escalation_rate", "mean_latency_ms", "mean_cost_usd"]
+
+
+def run(prompt_version: str, dataset: str, data_path: str, workers: int, **kwargs) -> dict:
+    from src.evaluator import Evaluator
+    ev = Evaluator(prompt_version, dataset_name=dataset, rps=0, max_workers=workers, **kwargs)
+    df = ev.run(data_path)
+    return ev.metrics(df, n_boot=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-model and cascade runs per dataset.")
+    parser.add_argument("--version", default=config.DEFAULT_PROMPT_VERSION)
+    parser.add_argument("--thresholds", nargs="*", type=float, default=[0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--live", action="store_true", help="call the configured provider instead of the simulator")
+    parser.add_argument("--latency-ms", type=float, default=20, help="simulated median base latency")
+    args = parser.parse_args()
+
+    if not args.live:
+        config.LLM_PROVIDER = "local"
+        config.SIM_LATENCY_MS = args.latency_ms
+    from src.llm_client import LLMClient
+
+    datasets = {"gold": config.GOLD_DATA_PATH, "drift": config.DRIFT_DATA_PATH}
+    print(f"{'dataset':<8}{'run':<22}" + "".join(f"{c[:16]:>18}" for c in COLS))
+    for name, path in datasets.items():
+        runs = [
+            ("small only", dict(cascade=False, llm=LLMClient(model=config.CASCADE_SMALL_MODEL))),
+            ("strong only", dict(cascade=False, llm=LLMClient(model=config.CASCADE_STRONG_MODEL))),
+        ]
+        for label, kwargs in runs:
+            m = run(args.version, name, path, args.workers, **kwargs)
+            print(f"{name:<8}{label:<22}" + "".join(f"{str(m.get(c, '—')):>18}" for c in COLS))
+        for threshold in args.thresholds:
+            config.CASCADE_MIN_CONFIDENCE = threshold
+            m = run(args.version, name, path, args.workers, cascade=True)
+            flag = "" if m["high_severity_recall_ok"] else "  ⚠️ below HS recall threshold"
+            print(f"{name:<8}{f'cascade @ {threshold}':<22}"
+                  + "".join(f"{str(m.get(c, '—')):>18}" for c in COLS) + flag)
+
+
+if __name__ == "__main__":
+    main()
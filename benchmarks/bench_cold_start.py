@@ -0,0 +1,102 @@
+"""
+benchmarks/bench_cold_start.py
+Cold start and per-click latency of the Live Tester path.
+
+Measured in fresh subprocesses so import costs are real:
+  - import time of src.agent (what the dashboard pays on first use)
+  - first Agent construction and first classify
+Then, in-process, the per-click cost of a Classify click:
+  - "new agent": construct an Agent per click (the old Live Tester path)
+  - "registry": AgentRegistry.get(...).classify(...) on a warm registry
+Uses the local simulated provider unless --live is given.
+
+Usage:
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --clicks 200 --latency-ms 0
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import config
+
+COLD_START = """
+import json, time
+t0 = time.perf_counter()
+from src.agent import Agent
+t1 = time.perf_counter()
+agent = Agent({version!r})
+t2 = time.perf_counter()
+agent.classify("Guaranteed 10x returns, DM me to join the signal group")
+t3 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "construct_ms": (t2 - t1) * 1000,
+                  "first_classify_ms": (t3 - t2) * 1000}}))
+"""
+
+TEXT = "Send 0.5 BTC to this wallet and I'll send back 1 BTC within the hour"
+
+
+def cold_start(version: str, runs: int, env: dict) -> dict:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", COLD_START.format(version=version)],
+                             capture_output=True, text=True, env=env, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {k: round(statistics.median(s[k] for s in samples), 1) for k in samples[0]}
+
+
+def per_click(version: str, clicks: int) -> dict:
+    from src.agent import Agent
+    from src.registry import AgentRegistry
+
+    def timed(fn) -> list:
+        samples = []
+        for _ in range(clicks):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    registry = AgentRegistry()
+    registry.get(version)  # warm
+    results = {}
+    for name, fn in (("new agent", lambda: Agent(version).classify(TEXT)),
+                     ("registry", lambda: registry.get(version).classify(TEXT))):
+        samples = sorted(timed(fn))
+        results[name] = {"p50_ms": round(samples[len(samples) // 2], 3),
+                         "p95_ms": round(samples[int(len(samples) * 0.95)], 3)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start and per-click classify latency.")
+    parser.add_argument("--version", default=config.DEFAULT_PROMPT_VERSION)
+    parser.add_argument("--runs", type=int, default=5, help="cold-start subprocess runs")
+    parser.add_argument("--clicks", type=int, default=100)
+    parser.add_argument("--live", action="store_true", help="call the configured provider instead of the simulator")
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated median base latency (0 isolates client overhead)")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if not args.live:
+        config.LLM_PROVIDER = "local"
+        config.SIM_LATENCY_MS = args.latency_ms
+        config.SIM_MS_PER_OUTPUT_TOKEN = 0  # isolate client-side overhead
+        env.update(LLM_PROVIDER="local", SIM_LATENCY_MS=str(args.latency_ms), SIM_MS_PER_OUTPUT_TOKEN="0")
+
+    cold = cold_start(args.version, args.runs, env)
+    print(f"Cold start ({args.version}, median of {args.runs} fresh processes)")
+    for k, v in cold.items():
+        print(f"   {k:<20}{v:>10.1f} ms")
+
+    print(f"\nPer click ({args.clicks} clicks)")
+    for name, r in per_click(args.version, args.clicks).items():
+        print(f"   {name:<20}p50 {r['p50_ms']:>9.3f} ms   p95 {r['p95_ms']:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
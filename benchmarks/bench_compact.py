@@ -0,0 +1,63 @@
+"""
+benchmarks/bench_compact.py
+Full vs compact verdict output, per prompt version.
+
+Runs every prompt version over a dataset twice, once with the full JSON
+verdict and once in compact mode (violation code only), and reports
+recall, high-severity recall, p50/p95 latency and output tokens per case
+with the compact-minus-full deltas. Uses the local simulated provider
+unless --live is given (then the configured provider is called).
+
+Usage:
+    python -m benchmarks.bench_compact
+    python -m benchmarks.bench_compact --live --data data/drift_cases.jsonl
+"""
+
+import argparse
+import config
+
+
+def run(prompt_version: str, data_path: str, compact: bool, workers: int) -> dict:
+    from src.evaluator import Evaluator
+    ev = Evaluator(prompt_version, dataset_name="bench", rps=0, max_workers=workers, compact=compact)
+    df = ev.run(data_path)
+    m = ev.metrics(df, n_boot=0)
+    return {
+        "recall": m["recall"],
+        "high_severity_recall": m["high_severity_recall"],
+        "p50_latency_ms": m["p50_latency_ms"],
+        "p95_latency_ms": m["p95_latency_ms"],
+        "output_tokens_per_case": round(m["output_tokens"] / max(1, m["dataset_size"]), 1),
+        "parse_error_count": m["parse_error_count"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and compact verdict output per prompt version.")
+    parser.add_argument("--data", default=config.GOLD_DATA_PATH)
+    parser.add_argument("--versions", nargs="*", default=None)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--live", action="store_true", help="call the configured provider instead of the simulator")
+    parser.add_argument("--latency-ms", type=float, default=20, help="simulated median base latency")
+    args = parser.parse_args()
+
+    if not args.live:
+        config.LLM_PROVIDER = "local"
+        config.SIM_LATENCY_MS = args.latency_ms
+    from src.sweep import available_versions
+    versions = args.versions or available_versions()
+
+    cols = ["recall", "high_severity_recall", "p50_latency_ms", "p95_latency_ms",
+            "output_tokens_per_case", "parse_error_count"]
+    print(f"{'version':<18}{'mode':<9}" + "".join(f"{c[:14]:>16}" for c in cols))
+    for version in versions:
+        full = run(version, args.data, False, args.workers)
+        compact = run(version, args.data, True, args.workers)
+        for mode, r in (("full", full), ("compact", compact)):
+            print(f"{version:<18}{mode:<9}" + "".join(f"{r[c]:>16}" for c in cols))
+        delta = {c: round(compact[c] - full[c], 4) for c in cols}
+        print(f"{version:<18}{'Δ':<9}" + "".join(f"{delta[c]:>+16}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
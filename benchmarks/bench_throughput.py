@@ -0,0 +1,98 @@
+"""
+benchmarks/bench_throughput.py
+Offline throughput benchmark against the local simulated provider.
+
+Measures end-to-end cases/sec, p50/p95/p99 latency and per-case overhead
+(wall time per case not explained by simulated provider latency) for
+sequential, concurrent and batched evaluation. Exits non-zero when p95
+exceeds config.LATENCY_P95_THRESHOLD_MS or throughput regresses against
+the stored baseline.
+
+Usage:
+    python -m benchmarks.bench_throughput
+    python -m benchmarks.bench_throughput --update-baseline
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+import numpy as np
+import config
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+MODES = {
+    "sequential": {"max_workers": 1, "batch_size": 1},
+    "concurrent": {"max_workers": 16, "batch_size": 1},
+    "batched": {"max_workers": 4, "batch_size": 10},
+}
+
+
+def run_mode(name: str, data_path: str, prompt_version: str, **kwargs) -> dict:
+    from src.evaluator import Evaluator
+    ev = Evaluator(prompt_version, dataset_name="bench", rps=0, **kwargs)
+    df = ev.run(data_path)
+    stats = ev.run_stats
+    latency = df.latency_ms.to_numpy(dtype=float)
+    p50, p95, p99 = np.quantile(latency, [0.50, 0.95, 0.99])
+    # Only meaningful sequentially: wall time per call minus provider latency = our own overhead
+    overhead_ms = None
+    if kwargs["max_workers"] == 1 and kwargs["batch_size"] == 1:
+        overhead_ms = stats["wall_time_s"] * 1000 / max(1, stats["cases"]) - float(latency.mean())
+    return {
+        "mode": name,
+        "cases": stats["cases"],
+        "cases_per_s": stats["cases_per_s"],
+        "llm_calls": stats["llm_calls"],
+        "p50_latency_ms": round(float(p50), 1),
+        "p95_latency_ms": round(float(p95), 1),
+        "p99_latency_ms": round(float(p99), 1),
+        "overhead_ms_per_case": round(overhead_ms, 2) if overhead_ms is not None else None,
+        "parse_error_count": int((df.pred_violation == "PARSE_ERROR").sum()),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark (simulated provider).")
+    parser.add_argument("--data", default=config.GOLD_DATA_PATH)
+    parser.add_argument("--prompt-version", default="v3_high_recall")
+    parser.add_argument("--modes", nargs="*", default=list(MODES))
+    parser.add_argument("--latency-ms", type=float, default=20, help="simulated median base latency")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional throughput drop vs baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Configure the simulated provider before any client is constructed
+    config.LLM_PROVIDER = "local"
+    config.SIM_LATENCY_MS = args.latency_ms
+    config.SIM_MS_PER_OUTPUT_TOKEN = config.SIM_MS_PER_OUTPUT_TOKEN * args.latency_ms / 300
+
+    results = {name: run_mode(name, args.data, args.prompt_version, **MODES[name]) for name in args.modes}
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+
+    failures = []
+    print(f"{'mode':<12}{'cases/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'overhead':>10}{'calls':>7}")
+    for name, r in results.items():
+        overhead = "-" if r["overhead_ms_per_case"] is None else f"{r['overhead_ms_per_case']:.2f}"
+        print(f"{name:<12}{r['cases_per_s']:>10.1f}{r['p50_latency_ms']:>9.1f}{r['p95_latency_ms']:>9.1f}"
+              f"{r['p99_latency_ms']:>9.1f}{overhead:>10}{r['llm_calls']:>7}")
+        if r["p95_latency_ms"] > config.LATENCY_P95_THRESHOLD_MS:
+            failures.append(f"{name}: p95 {r['p95_latency_ms']}ms > {config.LATENCY_P95_THRESHOLD_MS}ms")
+        base = baseline.get(name)
+        if base and r["cases_per_s"] < base["cases_per_s"] * (1 - args.tolerance):
+            failures.append(f"{name}: {r['cases_per_s']} cases/s < baseline {base['cases_per_s']} "
+                            f"(-{args.tolerance:.0%} allowed)")
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,77 @@ import os
 # LLM Provider — set via environment variable
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "anthropic")
 LLM_MODEL = os.getenv("LLM_MODEL", "claude-haiku-4-5-20251001")
+MAX_TOKENS = 512
+LLM_STREAM = os.getenv("LLM_STREAM", "0") == "1"  # stream and stop once the JSON verdict closes
+PROMPT_CACHING = os.getenv("LLM_PROMPT_CACHING", "1") == "1"  # static prefix as cacheable system block
+BATCH_TOKENS_PER_ITEM = 160  # output budget per item in classify_batch
+
+# Compact verdicts — model returns only the violation code; the rest comes from the taxonomy
+COMPACT_VERDICTS = os.getenv("LLM_COMPACT_VERDICTS", "0") == "1"
+COMPACT_RATIONALE = os.getenv("LLM_COMPACT_RATIONALE", "0") == "1"  # ask for a short rationale too
+COMPACT_MAX_TOKENS = 24             # {"violation": "MONEY_MULE_RECRUITMENT"}
+COMPACT_RATIONALE_MAX_TOKENS = 64
+COMPACT_BATCH_TOKENS_PER_ITEM = 24  # + rationale budget when enabled
+
+# Confidence-gated cascade — small model first; low-confidence, borderline,
+# unparseable and not-clearly-safe allow verdicts are re-run on the strong model
+CASCADE = os.getenv("LLM_CASCADE", "0") == "1"
+CASCADE_SMALL_MODEL = os.getenv("LLM_CASCADE_SMALL_MODEL") or LLM_MODEL
+CASCADE_STRONG_MODEL = os.getenv("LLM_CASCADE_STRONG_MODEL") or (
+    "gpt-4o" if LLM_PROVIDER == "openai" else "claude-sonnet-4-5-20250929")
+CASCADE_MIN_CONFIDENCE = float(os.getenv("LLM_CASCADE_MIN_CONFIDENCE", "0.8"))
+# Stricter bar for small-tier allows: a confident miss there is how high-severity
+# recall drops. HIGH_SEVERITY_RECALL_THRESHOLD is checked offline, not enforced.
+CASCADE_MIN_ALLOW_CONFIDENCE = float(os.getenv("LLM_CASCADE_MIN_ALLOW_CONFIDENCE", "0.95"))
+CASCADE_ESCALATE_SEVERITIES = {"medium"}  # borderline: severity needing human-level judgement
+CASCADE_CONFIDENCE_TOKENS = 8  # extra output budget per verdict for "confidence": 0.87
+
+# USD per million tokens: (uncached input, cache read, output) — for evaluator cost reports
+MODEL_PRICES = {
+    "claude-haiku-4-5-20251001": (1.00, 0.10, 5.00),
+    "claude-sonnet-4-5-20250929": (3.00, 0.30, 15.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+# Tail latency and failover (src/llm_client.py)
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"                    # duplicate attempts slower than rolling p95
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))       # latencies in the rolling window
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))  # hedges per call, cost cap
+LLM_CALL_THREADS = int(os.getenv("LLM_CALL_THREADS", "64"))
+LLM_FALLBACK_PROVIDER = os.getenv("LLM_FALLBACK_PROVIDER")         # unset → no failover
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL")
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))  # consecutive failures to open
+LLM_BREAKER_RESET_S = float(os.getenv("LLM_BREAKER_RESET_S", "30"))
+
+# Tracing — per-call spans exported as OTLP/JSON lines when set
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+
+# Local simulated provider (LLM_PROVIDER=local) — offline load tests
+SIM_LATENCY_MS = float(os.getenv("SIM_LATENCY_MS", "300"))          # median base latency
+SIM_LATENCY_SIGMA = float(os.getenv("SIM_LATENCY_SIGMA", "0.35"))   # lognormal spread
+SIM_MS_PER_OUTPUT_TOKEN = float(os.getenv("SIM_MS_PER_OUTPUT_TOKEN", "5"))
+SIM_429_RATE = float(os.getenv("SIM_429_RATE", "0"))
+SIM_529_RATE = float(os.getenv("SIM_529_RATE", "0"))
+SIM_MALFORMED_RATE = float(os.getenv("SIM_MALFORMED_RATE", "0"))
+SIM_RESPONSES_PATH = os.getenv("SIM_RESPONSES_PATH")               # JSONL of {"text", "response"}
+SIM_SEED = int(os.getenv("SIM_SEED", "0"))
+
+# Classification service (src/server.py)
+SERVICE_MAX_CONCURRENCY = int(os.getenv("SERVICE_MAX_CONCURRENCY", "8"))
+SERVICE_MAX_QUEUE = int(os.getenv("SERVICE_MAX_QUEUE", "64"))
+SERVICE_DEADLINE_MS = float(os.getenv("SERVICE_DEADLINE_MS", "5000"))  # default per-request deadline
+
+# Online drift detection (src/drift_monitor.py) — current vs reference window of fixed panes
+DRIFT_PANE_S = float(os.getenv("DRIFT_PANE_S", "60"))
+DRIFT_CURRENT_PANES = int(os.getenv("DRIFT_CURRENT_PANES", "15"))      # 15 min current window
+DRIFT_REFERENCE_PANES = int(os.getenv("DRIFT_REFERENCE_PANES", "240"))  # 4 h reference window
+DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", "200"))          # per window before checks run
+DRIFT_PSI_THRESHOLD = float(os.getenv("DRIFT_PSI_THRESHOLD", "0.2"))
+DRIFT_PARSE_ERROR_DELTA = float(os.getenv("DRIFT_PARSE_ERROR_DELTA", "0.02"))  # absolute rate increase
+DRIFT_LATENCY_RATIO = float(os.getenv("DRIFT_LATENCY_RATIO", "1.5"))    # current / reference p95
+DRIFT_STATE_PATH = os.getenv("DRIFT_STATE_PATH", "logs/drift/state.json")
 
 # Paths
 POLICY_PATH = "policy/policy.md"
@@ -17,6 +88,22 @@ DRIFT_DATA_PATH = "data/drift_cases.jsonl"
 PROMPT_DIR = "prompts/"
 DEFAULT_PROMPT_VERSION = "v1_baseline"
 
+# Response cache (deterministic inference → safe to reuse responses)
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_responses.sqlite")
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000"))
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_MAX_AGE_DAYS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "0") == "1"
+
+# Rules tier (src/rules.py) — 1 lets posts with no domain term or money/contact
+# cue be allowed without an LLM call; off, only rule violations short-circuit
+RULES_ALLOW_BENIGN = os.getenv("RULES_ALLOW_BENIGN", "0") == "1"
+
+# Near-duplicate verdict reuse (src/near_dup.py) — Jaccard over normalized 5-gram shingles
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NEAR_DUP_BENIGN_THRESHOLD = float(os.getenv("NEAR_DUP_BENIGN_THRESHOLD", "0.95"))  # stricter for allow
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "100000"))
+
 # Evaluation thresholds
 HIGH_SEVERITY_RECALL_THRESHOLD = 0.85
 LATENCY_P95_THRESHOLD_MS = 6000
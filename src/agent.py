@@ -3,15 +3,48 @@ src/agent.py
 Core classification agent.
 Calls LLM, parses structured output, returns AgentOutput.
 Parse failure defaults to escalate_review — never silent allow.
+An optional RulesFilter tier answers confident cases before any LLM call,
+an optional NearDuplicateIndex reuses verdicts of near-identical prior
+posts, and an optional ResponseCache short-circuits repeat prompts.
+Every LLM-path call is traced (build, rate_wait, cache_lookup, network,
+retry_sleep, parse); the trace summary is attached to AgentOutput.trace
+and handed to any registered tracing exporters.
+classify_batch packs several items into one request; each item is parsed
+independently and falls back to PARSE_ERROR_DEFAULT on its own.
+In compact mode the model returns only the violation code (and optionally a
+short rationale); label, category, severity and enforcement are filled in
+from the taxonomy, and unknown codes take the PARSE_ERROR_DEFAULT path.
+In cascade mode the small model (CASCADE_SMALL_MODEL) answers first with a
+confidence score. Parse failures, low-confidence and borderline (medium
+severity / escalate_review) verdicts are re-run on CASCADE_STRONG_MODEL, as
+are allows below the stricter CASCADE_MIN_ALLOW_CONFIDENCE and allows of
+posts that hit a rule pattern. HIGH_SEVERITY_RECALL_THRESHOLD is checked
+offline by the Evaluator; the gate lowers the risk of a small-tier miss but
+does not enforce the threshold.
+The strong verdict wins, except that a high-severity small-tier violation
+is never downgraded. If the strong tier fails, the stricter of the small
+verdict and CASCADE_UNRESOLVED is returned. Per-tier model, latency,
+confidence and usage are attached to AgentOutput.cascade.
 """
 
 import json
-import re
-from src.llm_client import LLMClient
-from src.prompt_builder import PromptBuilder
-from src.schema import AgentOutput
+import threading
+import time
+from typing import TYPE_CHECKING
+from src.json_stream import extract_first_object
+from src.llm_client import LLMClient, LLMResponse
+from src.concurrency import RateLimiter
+from src.prompt_builder import UNCERTAIN_CODE, PromptBuilder
+from src.response_cache import ResponseCache
+from src.rules import RulesFilter
+from src.schema import AgentOutput, severity_key
+from src.taxonomy import code_index, load_taxonomy
+from src.tracing import Trace, export
 import config
 
+if TYPE_CHECKING:
+    from src.near_dup import NearDuplicateIndex  # numpy-backed; not needed to classify
+
 PARSE_ERROR_DEFAULT = {
     "label": 1,
     "category": "none",
@@ -21,27 +54,145 @@ PARSE_ERROR_DEFAULT = {
     "rationale": "Model output parsing failed — escalated for safety."
 }
 
+CASCADE_UNRESOLVED = {
+    **PARSE_ERROR_DEFAULT,
+    "violation": "CASCADE_UNRESOLVED",
+    "rationale": "Uncertain small-model verdict and the strong model was unavailable — escalated for safety."
+}
+
 class Agent:
-    def __init__(self, prompt_version: str = None):
+    def __init__(self, prompt_version: str = None, cache: ResponseCache = None,
+                 limiter: RateLimiter = None, rules: RulesFilter = None,
+                 llm: LLMClient = None, prompt_caching: bool = None,
+                 near_dup: "NearDuplicateIndex" = None, compact: bool = None,
+                 taxonomy: dict = None, cascade: bool = None, strong_llm: LLMClient = None):
         self.prompt_version = prompt_version or config.DEFAULT_PROMPT_VERSION
-        self.llm = LLMClient()
-        self.builder = PromptBuilder(self.prompt_version)
+        self.cascade = config.CASCADE if cascade is None else cascade
+        if self.cascade:
+            self.llm = llm or LLMClient(model=config.CASCADE_SMALL_MODEL)
+            self.strong_llm = strong_llm or LLMClient(model=config.CASCADE_STRONG_MODEL)
+        else:
+            self.llm = llm or LLMClient()
+            self.strong_llm = None
+        self.compact = config.COMPACT_VERDICTS if compact is None else compact
+        self.codes = code_index(taxonomy or load_taxonomy()) if self.compact else None
+        self.builder = PromptBuilder(
+            self.prompt_version, compact=self.compact,
+            rationale=config.COMPACT_RATIONALE, codes=list(self.codes or []),
+            confidence=self.cascade
+        )
+        self.cache = cache
+        self.limiter = limiter  # applied to provider calls only; cache hits are free
+        self.rules = rules
+        # Rule patterns double as escalation signals for small-tier allows
+        self._signals = (rules or RulesFilter(taxonomy)) if self.cascade else None
+        self.near_dup = near_dup
+        # Send the template's static prefix as a cacheable system block
+        self.prompt_caching = config.PROMPT_CACHING if prompt_caching is None else prompt_caching
+        self.stats = {"llm_calls": 0, "prompt_chars": 0, "escalations": 0}
+        self._stats_lock = threading.Lock()
+
+    def classify(self, text: str, policy_context: str = None, trace: Trace = None,
+                 deadline_ms: float = None) -> AgentOutput:
+        """deadline_ms: budget for the provider call; LLMClient raises DeadlineExceeded past it."""
+        shortcut = self._shortcut(text)
+        if shortcut is not None:
+            return shortcut
+
+        start = time.perf_counter()
+        trace = trace or Trace(prompt_version=self.prompt_version)
+        with trace.span("build"):
+            if policy_context:
+                parts = self.builder.build_parts(text=text, policy_context=policy_context)
+            else:
+                parts = self.builder.build_parts(text=text)
+
+        max_tokens = None
+        if self.compact:
+            max_tokens = config.COMPACT_RATIONALE_MAX_TOKENS if config.COMPACT_RATIONALE else config.COMPACT_MAX_TOKENS
+            if self.cascade:
+                max_tokens += config.CASCADE_CONFIDENCE_TOKENS
+        response, source = self._generate(parts, max_tokens=max_tokens, trace=trace, deadline_ms=deadline_ms)
+        with trace.span("parse"):
+            parsed = self._parse(response.text)
+        if self.cascade:
+            output = self._cascade(text, parts, self._verdict(parsed), response, source, max_tokens, trace,
+                                   _remaining_ms(deadline_ms, start))
+        else:
+            output = self._output(self._verdict(parsed), response, source, trace)
+        export(trace)
+        if self.near_dup is not None:
+            self.near_dup.add(text, output)
+        return output
 
-    def classify(self, text: str, policy_context: str = None) -> AgentOutput:
-        if policy_context:
-            prompt = self.builder.build(text=text, policy_context=policy_context)
+    def classify_batch(self, texts: list, trace: Trace = None, deadline_ms: float = None) -> list:
+        """
+        Classify several texts with one request. Returns one AgentOutput per
+        text, in order. Every item carries the latency of the shared call.
+        """
+        outputs = [self._shortcut(text) for text in texts]
+        pending = [i for i, out in enumerate(outputs) if out is None]
+        if not pending:
+            return outputs
+        start = time.perf_counter()
+        trace = trace or Trace("classify_batch", prompt_version=self.prompt_version)
+        ids = [str(i + 1) for i in pending]
+        with trace.span("build", items=len(pending)):
+            parts = self.builder.build_batch_parts([(item_id, texts[i]) for item_id, i in zip(ids, pending)])
+        per_item = config.BATCH_TOKENS_PER_ITEM
+        if self.compact:
+            per_item = config.COMPACT_BATCH_TOKENS_PER_ITEM + (
+                config.COMPACT_RATIONALE_MAX_TOKENS if config.COMPACT_RATIONALE else 0)
+        if self.cascade:
+            per_item += config.CASCADE_CONFIDENCE_TOKENS
+        max_tokens = per_item * len(pending)
+        response, source = self._generate(parts, max_tokens=max_tokens, trace=trace,
+                                          deadline_ms=deadline_ms, openers="[")
+        if response.usage:
+            # Attribute the shared call's tokens evenly across its items
+            response.usage = {k: v / len(pending) for k, v in response.usage.items()}
+        with trace.span("parse"):
+            by_id = self._parse_batch(response.text)
+        verdicts = [self._verdict(by_id.get(item_id, {"_parse_error": True})) for item_id in ids]
+        if self.cascade:
+            results = self._cascade_batch([texts[i] for i in pending], verdicts, response, source, per_item,
+                                          trace, _remaining_ms(deadline_ms, start))
         else:
-            prompt = self.builder.build(text=text)
+            results = [(verdict, response, source, None) for verdict in verdicts]
+        export(trace)
+        for i, (verdict, item_response, item_source, cascade) in zip(pending, results):
+            outputs[i] = self._output(verdict, item_response, item_source, trace, cascade)
+            if self.near_dup is not None:
+                self.near_dup.add(texts[i], outputs[i])
+        return outputs
 
-        response_text, latency_ms = self.llm.generate(prompt)
-        parsed = self._parse(response_text)
+    def _shortcut(self, text: str):
+        """Verdict without a provider call: rules tier, then near-duplicate reuse."""
+        if self.rules is not None:
+            ruled = self.rules.match(text, self.prompt_version)
+            if ruled is not None:
+                return ruled
+        if self.near_dup is not None:
+            return self.near_dup.match(text, self.prompt_version)
+        return None
 
+    def _verdict(self, parsed: dict) -> dict:
+        """Parsed model output → full verdict (plus confidence, when given)."""
+        confidence = _confidence(parsed.get("confidence")) if isinstance(parsed, dict) else None
+        if self.compact:
+            parsed = self._expand(parsed)
         # Sentinel key indicates clean parse failure
-        if parsed.get("_parse_error"):
-            data = PARSE_ERROR_DEFAULT
-        else:
-            data = {**PARSE_ERROR_DEFAULT, **parsed}
+        if not isinstance(parsed, dict) or parsed.get("_parse_error"):
+            return dict(PARSE_ERROR_DEFAULT)
+        verdict = {**PARSE_ERROR_DEFAULT, **parsed, "confidence": confidence}
+        # "1" → 1; anything that is not 0/1 ("violation", 2) is a parse failure
+        verdict["label"] = _label(verdict["label"])
+        if verdict["label"] is None:
+            return dict(PARSE_ERROR_DEFAULT)
+        return verdict
 
+    def _output(self, data: dict, response: LLMResponse, source: str,
+                trace: Trace = None, cascade: dict = None) -> AgentOutput:
         return AgentOutput(
             label=data["label"],
             domain="financial_integrity",
@@ -51,17 +202,234 @@ class Agent:
             enforcement=data["enforcement"],
             rationale=data["rationale"],
             prompt_version=self.prompt_version,
-            latency_ms=round(latency_ms, 2)
+            latency_ms=round(response.latency_ms, 2),
+            source=source,
+            ttft_ms=_round(response.ttft_ms),
+            verdict_ms=_round(response.verdict_ms),
+            usage=response.usage,
+            trace=trace.to_dict() if trace is not None else None,
+            confidence=data.get("confidence"),
+            cascade=cascade
         )
 
+    # ── Cascade ─────────────────────────────────────────────────────────────
+    def _escalation_reason(self, verdict: dict, text: str):
+        """Why a small-tier verdict needs the strong model, or None."""
+        if verdict["violation"] == "PARSE_ERROR":
+            return "parse_error"
+        confidence = verdict.get("confidence")
+        if confidence is None or confidence < config.CASCADE_MIN_CONFIDENCE:
+            return "low_confidence"
+        # A small-tier allow is the only verdict that can lose a high-severity case
+        if verdict["label"] == 0:
+            if confidence < config.CASCADE_MIN_ALLOW_CONFIDENCE:
+                return "uncertain_allow"
+            if self._signals.scan(text)["codes"]:
+                return "rule_signal"
+        if verdict["severity"] in config.CASCADE_ESCALATE_SEVERITIES or verdict["enforcement"] == "escalate_review":
+            return "borderline"
+        return None
+
+    def _cascade(self, text: str, parts: tuple, small: dict, response: LLMResponse, source: str,
+                 max_tokens: int, trace: Trace, deadline_ms: float) -> AgentOutput:
+        reason = self._escalation_reason(small, text)
+        info = {"escalated": reason is not None, "reason": reason,
+                "tiers": [_tier("small", self.llm.model, small, response, source)]}
+        if reason is None:
+            return self._output(small, response, source, trace, info)
+        with self._stats_lock:
+            self.stats["escalations"] += 1
+        try:
+            with trace.span("escalate", model=self.strong_llm.model, reason=reason):
+                strong_response, strong_source = self._generate(
+                    parts, max_tokens=max_tokens, trace=trace, deadline_ms=deadline_ms, llm=self.strong_llm
+                )
+            with trace.span("parse"):
+                strong = self._verdict(self._parse(strong_response.text))
+        except Exception as e:
+            # Strong tier unavailable (errors, deadline): fail safe on the small verdict
+            info["strong_error"] = str(e)
+            return self._output(_final_verdict(small, None), response, source, trace, info)
+        info["tiers"].append(_tier("strong", self.strong_llm.model, strong, strong_response, strong_source))
+        return self._output(_final_verdict(small, strong), _combine(response, strong_response),
+                            strong_source, trace, info)
+
+    def _cascade_batch(self, texts: list, smalls: list, response: LLMResponse, source: str,
+                       per_item: int, trace: Trace, deadline_ms: float) -> list:
+        """Cascade for classify_batch: escalated items share one strong-tier batch request."""
+        reasons = [self._escalation_reason(small, text) for small, text in zip(smalls, texts)]
+        infos = [{"escalated": reason is not None, "reason": reason,
+                  "tiers": [_tier("small", self.llm.model, small, response, source)]}
+                 for small, reason in zip(smalls, reasons)]
+        results = [(small, response, source, info) for small, info in zip(smalls, infos)]
+        escalate = [j for j, reason in enumerate(reasons) if reason is not None]
+        if not escalate:
+            return results
+        with self._stats_lock:
+            self.stats["escalations"] += len(escalate)
+        ids = [str(k + 1) for k in range(len(escalate))]
+        try:
+            with trace.span("escalate", model=self.strong_llm.model, items=len(escalate)):
+                parts = self.builder.build_batch_parts([(item_id, texts[j]) for item_id, j in zip(ids, escalate)])
+                strong_response, strong_source = self._generate(
+                    parts, max_tokens=per_item * len(escalate), trace=trace,
+                    deadline_ms=deadline_ms, llm=self.strong_llm, openers="["
+                )
+            if strong_response.usage:
+                strong_response.usage = {k: v / len(escalate) for k, v in strong_response.usage.items()}
+            with trace.span("parse"):
+                by_id = self._parse_batch(strong_response.text)
+        except Exception as e:
+            for j in escalate:
+                infos[j]["strong_error"] = str(e)
+                results[j] = (_final_verdict(smalls[j], None), response, source, infos[j])
+            return results
+        combined = _combine(response, strong_response)
+        for item_id, j in zip(ids, escalate):
+            strong = self._verdict(by_id.get(item_id, {"_parse_error": True}))
+            infos[j]["tiers"].append(_tier("strong", self.strong_llm.model, strong, strong_response, strong_source))
+            results[j] = (_final_verdict(smalls[j], strong), combined, strong_source, infos[j])
+        return results
+
+    def _expand(self, parsed: dict) -> dict:
+        """Compact verdict → full verdict from the taxonomy code index."""
+        if not isinstance(parsed, dict) or parsed.get("_parse_error"):
+            return parsed
+        code = str(parsed.get("violation", "")).strip().upper()
+        rationale = parsed.get("rationale")
+        if code == "NONE":
+            return {"label": 0, "category": "none", "violation": "NONE", "severity": "low",
+                    "enforcement": "allow", "rationale": rationale or "No violation code returned."}
+        if code == UNCERTAIN_CODE:
+            return {**PARSE_ERROR_DEFAULT, "violation": UNCERTAIN_CODE,
+                    "rationale": rationale or "Financially suggestive, intent unclear — escalated for review."}
+        v = self.codes.get(code)
+        if v is None:
+            return {**PARSE_ERROR_DEFAULT,
+                    "rationale": f"Unknown violation code '{code}' — escalated for safety."}
+        return {"label": 1, "category": v["category"], "violation": code, "severity": v["severity"],
+                "enforcement": v["enforcement"], "rationale": rationale or v["description"]}
+
+    def _generate(self, parts: tuple, max_tokens: int = None, trace: Trace = None,
+                  deadline_ms: float = None, llm: LLMClient = None, openers: str = "{") -> tuple:
+        """openers: "{" for a single verdict, "[" for a batch array (closes a streamed reply)."""
+        llm = llm or self.llm
+        trace = trace or Trace()
+        prefix, suffix = parts
+        prompt = prefix + suffix
+        key = None
+        if self.cache is not None:
+            with trace.span("cache_lookup"):
+                key = ResponseCache.make_key(
+                    llm.provider, llm.model, self.builder.template_hash, prompt
+                )
+                hit = self.cache.get(key)
+            if hit is not None:
+                return LLMResponse(text=hit[0], latency_ms=hit[1]), "cache"
+        if self.limiter is not None:
+            waited_s = self.limiter.acquire()
+            trace.add("rate_wait", waited_s * 1000)
+        with self._stats_lock:
+            self.stats["llm_calls"] += 1
+            self.stats["prompt_chars"] += len(prompt)
+        if self.prompt_caching and prefix:
+            response = llm.complete(suffix, max_tokens=max_tokens, system=prefix,
+                                    trace=trace, deadline_ms=deadline_ms, openers=openers)
+        else:
+            response = llm.complete(prompt, max_tokens=max_tokens, trace=trace,
+                                    deadline_ms=deadline_ms, openers=openers)
+        # Fallback-model responses are not stored under the primary model's key
+        if key is not None and not response.failover:
+            self.cache.put(key, response.text, response.latency_ms)
+        return response, "llm"
+
     def _parse(self, response_text: str) -> dict:
         try:
             return json.loads(response_text)
         except json.JSONDecodeError:
-            match = re.search(r"\{.*\}", response_text, re.DOTALL)
-            if match:
+            # Recover the first balanced object from chatty output
+            candidate = extract_first_object(response_text)
+            if candidate:
                 try:
-                    return json.loads(match.group())
+                    return json.loads(candidate)
                 except json.JSONDecodeError:
                     pass
         return {"_parse_error": True}
+
+    def _parse_batch(self, response_text: str) -> dict:
+        """
+        Map item id -> parsed object. Objects are decoded one at a time so a
+        truncated or partly malformed array still yields its valid items.
+        """
+        decoder = json.JSONDecoder()
+        by_id = {}
+        pos = response_text.find("{")
+        while pos != -1:
+            try:
+                obj, end = decoder.raw_decode(response_text, pos)
+            except json.JSONDecodeError:
+                pos = response_text.find("{", pos + 1)
+                continue
+            if isinstance(obj, dict) and "id" in obj:
+                item_id = str(obj.pop("id"))
+                # Duplicate ids are ambiguous — escalate rather than guess
+                by_id[item_id] = {"_parse_error": True} if item_id in by_id else obj
+            pos = response_text.find("{", end)
+        return by_id
+
+
+def _round(value: float):
+    return round(value, 2) if value is not None else None
+
+
+def _label(value):
+    """Model-reported label as 0 or 1, or None when it is neither."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(value) if value in (0, 1) else None
+
+
+def _confidence(value):
+    """Model-reported confidence as a float in [0, 1], or None when missing/invalid."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return min(1.0, max(0.0, value)) if value == value else None
+
+
+def _remaining_ms(deadline_ms: float, start: float):
+    return deadline_ms - (time.perf_counter() - start) * 1000 if deadline_ms else None
+
+
+def _final_verdict(small: dict, strong: dict) -> dict:
+    """Strong verdict wins, but never downgrades a high-severity small-tier violation."""
+    if strong is None or strong["violation"] == "PARSE_ERROR":
+        # Strong tier failed: the stricter of the small verdict and the fail-safe default
+        fallback = CASCADE_UNRESOLVED if strong is None else PARSE_ERROR_DEFAULT
+        return max(small, fallback, key=severity_key)
+    if small["label"] == 1 and small["severity"] == "high" and severity_key(strong) < severity_key(small):
+        return small
+    return strong
+
+
+def _tier(name: str, model: str, verdict: dict, response: LLMResponse, source: str) -> dict:
+    return {
+        "tier": name, "model": model, "source": source,
+        "latency_ms": round(response.latency_ms, 2),
+        "confidence": verdict.get("confidence"),
+        "label": verdict["label"], "violation": verdict["violation"], "severity": verdict["severity"],
+        "usage": response.usage,
+    }
+
+
+def _combine(small: LLMResponse, strong: LLMResponse) -> LLMResponse:
+    """Both tiers as one response: latencies add up (sequential), usage is summed."""
+    usage = None
+    if small.usage or strong.usage:
+        a, b = small.usage or {}, strong.usage or {}
+        usage = {k: a.get(k, 0) + b.get(k, 0) for k in {**a, **b}}
+    return LLMResponse(text=strong.text, latency_ms=small.latency_ms + strong.latency_ms,
+                       ttft_ms=small.ttft_ms, usage=usage, failover=small.failover or strong.failover)
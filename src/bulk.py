@@ -0,0 +1,229 @@
+"""
+src/bulk.py
+Sharded multi-process bulk scoring of unlabeled post dumps.
+
+Inputs (JSONL or CSV, one record per line) are split into byte-range
+shards aligned to line starts. A process pool works through the shards;
+each process holds one warm Agent and scores its shard with a bounded
+thread window (ordered_map), streaming AgentOutput rows to its own part
+file. Memory stays bounded by the window, not the input size. When every
+shard is done the parts are concatenated in input order into a temp file
+and moved into place with os.replace, so the output appears atomically.
+
+The rate budget (--rps) is split evenly across processes.
+CSV fields must not contain embedded newlines (shards split on lines).
+
+Usage:
+    python -m src.bulk dump.jsonl --out scored.jsonl --processes 4 --workers 16 --rps 40
+    python -m src.bulk a.csv b.jsonl --out scored.jsonl --text-field body --id-field post_id
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from src.concurrency import RateLimiter, ordered_map
+import config
+
+MIN_SHARD_BYTES = 1 << 20
+SHARDS_PER_PROCESS = 4  # more shards than processes evens out slow shards
+
+# Per-process state, set by _init_worker
+_agent = None
+_opts = None
+_progress = None
+
+
+def plan_shards(paths: list, processes: int) -> list:
+    """Split inputs into (path, start, end, fieldnames) byte ranges starting on line boundaries."""
+    total = sum(Path(p).stat().st_size for p in paths)
+    target = max(MIN_SHARD_BYTES, total // max(1, processes * SHARDS_PER_PROCESS) + 1)
+    shards = []
+    for path in paths:
+        size = Path(path).stat().st_size
+        with open(path, "rb") as f:
+            fieldnames, start = None, 0
+            if Path(path).suffix.lower() == ".csv":
+                header = f.readline()
+                fieldnames = next(csv.reader([header.decode("utf-8-sig")]))
+                start = len(header)
+            while start < size:
+                f.seek(min(size, start + target))
+                f.readline()  # advance to the next line start
+                end = min(size, f.tell()) if start + target < size else size
+                shards.append((str(path), start, end, fieldnames))
+                start = end
+    return shards
+
+
+def _iter_records(path: str, start: int, end: int, fieldnames: list):
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            offset, pos = pos, pos + len(line)
+            text = line.decode("utf-8").strip()
+            if not text:
+                continue
+            if fieldnames is not None:
+                record = dict(zip(fieldnames, next(csv.reader([text]))))
+            else:
+                try:
+                    record = json.loads(text)
+                except json.JSONDecodeError:
+                    record = None
+                if not isinstance(record, dict):  # [1, 2], "x", 3 are valid JSON but not records
+                    record = {"_invalid": True}
+            yield offset, len(line), record
+
+
+def _init_worker(opts: dict, progress):
+    global _agent, _opts, _progress
+    from src.agent import Agent
+    from src.rules import RulesFilter
+    from src.near_dup import NearDuplicateIndex
+    _opts, _progress = opts, progress
+    _agent = Agent(
+        prompt_version=opts["prompt_version"],
+        limiter=RateLimiter(opts["rps"] / opts["processes"]) if opts["rps"] else None,
+        rules=RulesFilter() if opts["use_rules"] else None,
+        near_dup=NearDuplicateIndex() if opts["use_near_dup"] else None
+    )
+
+
+def _score_record(item) -> tuple:
+    offset, length, record, path = item
+    row_id = record.get(_opts["id_field"])
+    if row_id is None:  # 0 and "" are real ids
+        row_id = f"{Path(path).name}:{offset}"
+    text = record.get(_opts["text_field"])
+    if record.get("_invalid") or not isinstance(text, str):
+        return length, {"id": row_id, "error": f"missing or invalid '{_opts['text_field']}'"}
+    try:
+        output = _agent.classify(text).to_dict()
+    except Exception as e:
+        return length, {"id": row_id, "error": str(e)}
+    if not _opts["with_trace"]:
+        output.pop("trace", None)
+    return length, {"id": row_id, **output}
+
+
+def _score_shard(shard: tuple, part_path: str) -> dict:
+    path, start, end, fieldnames = shard
+    records = ((*item, path) for item in _iter_records(path, start, end, fieldnames))
+    counts = {"rows": 0, "errors": 0}
+    done_bytes = 0
+    with open(part_path, "w") as out:
+        for length, row in ordered_map(_score_record, records, _opts["workers"]):
+            out.write(json.dumps(row) + "\n")
+            counts["rows"] += 1
+            counts["errors"] += "error" in row
+            done_bytes += length
+            if counts["rows"] % 50 == 0:
+                _report(done_bytes, 50)
+                done_bytes = 0
+    _report(done_bytes, counts["rows"] % 50)
+    return counts
+
+
+def _report(n_bytes: int, n_rows: int):
+    with _progress.get_lock():
+        _progress[0] += n_bytes
+        _progress[1] += n_rows
+
+
+def score_files(paths: list, out_path: str, processes: int = None, workers: int = 8,
+                rps: float = None, prompt_version: str = None, text_field: str = "text",
+                id_field: str = "id", use_rules: bool = False, use_near_dup: bool = False,
+                with_trace: bool = False, log: bool = True) -> dict:
+    """Score every record in paths into out_path (JSONL, input order). Returns run stats."""
+    processes = processes or os.cpu_count() or 1
+    shards = plan_shards(paths, processes)
+    total_bytes = sum(end - start for _, start, end, _ in shards)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    parts = [out_path.with_name(f"{out_path.name}.part-{i:05d}") for i in range(len(shards))]
+    opts = {
+        "prompt_version": prompt_version or config.DEFAULT_PROMPT_VERSION,
+        "processes": processes, "workers": workers, "rps": rps,
+        "text_field": text_field, "id_field": id_field,
+        "use_rules": use_rules, "use_near_dup": use_near_dup, "with_trace": with_trace,
+    }
+    progress = mp.Array("d", 2)  # bytes done, rows done
+    start = time.perf_counter()
+    totals = {"rows": 0, "errors": 0}
+    try:
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(opts, progress)) as pool:
+            pending = {pool.submit(_score_shard, shard, str(part)) for shard, part in zip(shards, parts)}
+            while pending:
+                done, pending = wait(pending, timeout=2.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for k, v in future.result().items():
+                        totals[k] += v
+                if log:
+                    _print_progress(progress, total_bytes, time.perf_counter() - start)
+        # Atomic merge: parts → temp file → os.replace
+        tmp = out_path.with_name(out_path.name + ".tmp")
+        with open(tmp, "wb") as merged:
+            for part in parts:
+                with open(part, "rb") as f:
+                    while chunk := f.read(1 << 20):
+                        merged.write(chunk)
+        os.replace(tmp, out_path)
+    finally:
+        for part in parts:
+            part.unlink(missing_ok=True)
+
+    wall_s = time.perf_counter() - start
+    stats = {
+        "rows": totals["rows"],
+        "errors": totals["errors"],
+        "shards": len(shards),
+        "processes": processes,
+        "workers_per_process": workers,
+        "wall_time_s": round(wall_s, 2),
+        "rows_per_s": round(totals["rows"] / wall_s, 2) if wall_s > 0 else 0,
+        "out": str(out_path),
+    }
+    if log:
+        print(f"\n✅ {stats['rows']} rows ({stats['errors']} errors) → {out_path} "
+              f"in {stats['wall_time_s']}s ({stats['rows_per_s']} rows/s)")
+    return stats
+
+
+def _print_progress(progress, total_bytes: int, elapsed_s: float):
+    done_bytes, rows = progress[0], int(progress[1])
+    share = done_bytes / total_bytes if total_bytes else 1.0
+    rate = rows / elapsed_s if elapsed_s > 0 else 0.0
+    eta = elapsed_s * (1 - share) / share if share > 0 else float("nan")
+    print(f"\r   {share:6.1%}  {rows} rows  {rate:.1f} rows/s  eta {eta:.0f}s   ", end="", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score unlabeled JSONL/CSV dumps across processes.")
+    parser.add_argument("inputs", nargs="+", help="JSONL or CSV files")
+    parser.add_argument("--out", required=True, help="merged JSONL output path")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--workers", type=int, default=8, help="in-flight requests per process")
+    parser.add_argument("--rps", type=float, default=None, help="total requests-per-second budget")
+    parser.add_argument("--prompt-version", default=None)
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--rules", action="store_true", help="enable the rules pre-filter tier")
+    parser.add_argument("--near-dup", action="store_true", help="reuse near-duplicate verdicts")
+    parser.add_argument("--trace", action="store_true", help="keep per-call traces in the output")
+    args = parser.parse_args()
+
+    score_files(args.inputs, args.out, args.processes, args.workers, args.rps, args.prompt_version,
+                args.text_field, args.id_field, args.rules, args.near_dup, args.trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+src/concurrency.py
+Shared concurrency primitives for evaluation runs.
+A token-bucket rate limiter replaces fixed per-call sleeps, and an
+order-preserving bounded map keeps results aligned with input order.
+"""
+
+import threading
+import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket. acquire() blocks until a request slot is free.
+    rps=None or rps <= 0 disables limiting.
+    """
+
+    def __init__(self, rps: float = None, burst: int = 1):
+        self.rps = rps if rps and rps > 0 else None
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a slot is available. Returns seconds spent waiting."""
+        if self.rps is None:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rps)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rps
+            time.sleep(wait)
+            waited += wait
+
+
+def ordered_map(fn, items, max_workers: int = 1, executor: ThreadPoolExecutor = None):
+    """
+    Yield fn(item) for each item, in input order.
+    At most max_workers calls are in flight and at most 2 * max_workers
+    results are buffered, so memory stays bounded for lazily-read datasets.
+    """
+    if max_workers <= 1 and executor is None:
+        for item in items:
+            yield fn(item)
+        return
+
+    own_executor = executor is None
+    pool = executor or ThreadPoolExecutor(max_workers=max_workers)
+    window = deque()
+    try:
+        for item in items:
+            window.append(pool.submit(fn, item))
+            if len(window) >= 2 * max_workers:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+    finally:
+        for future in window:
+            future.cancel()
+        if own_executor:
+            pool.shutdown(wait=True)
+
+
+def chunked(items, size: int):
+    """Yield lists of up to size consecutive items."""
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
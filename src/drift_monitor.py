@@ -0,0 +1,330 @@
+"""
+src/drift_monitor.py
+Online drift detection over production verdicts.
+
+AgentOutputs are fed in as they are produced. Time is cut into fixed panes
+(DRIFT_PANE_S); each pane keeps only counts and sketches:
+  - violation-code and enforcement counts
+  - PARSE_ERROR count
+  - latency quantile sketch (1% relative error)
+  - input/output token and post-length sketches (coarse, 10%)
+Observing an output is O(1): it touches the open pane only. When a pane
+closes, the newest DRIFT_CURRENT_PANES panes (current window) are compared
+with the DRIFT_REFERENCE_PANES before them (reference window):
+  - PSI over violation, enforcement and length distributions
+  - PARSE_ERROR rate delta
+  - p95 latency ratio
+An alert fires when a check crosses its threshold (once per excursion).
+
+State is a bounded ring of panes, so four hours of traffic at one-minute
+panes is a few MB whatever the request rate. to_dict()/save() persist it for
+the dashboard, which renders report() without touching raw results.
+
+Usage:
+    python -m src.drift_monitor                 # print the saved report
+    python -m src.drift_monitor --state path.json
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from src.schema import AgentOutput
+from src.sketch import QuantileSketch
+import config
+
+LENGTH_ACCURACY = 0.1  # coarse buckets: length PSI compares shapes, not exact values
+PSI_EPSILON = 1e-4
+MAX_ALERTS = 200
+SKETCHES = ("latency", "input_tokens", "output_tokens", "text_chars")
+
+
+class Pane:
+    """Counts and sketches for one time slice."""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.n = 0
+        self.parse_errors = 0
+        self.violations = Counter()
+        self.enforcements = Counter()
+        self.latency = QuantileSketch()
+        self.input_tokens = QuantileSketch(LENGTH_ACCURACY)
+        self.output_tokens = QuantileSketch(LENGTH_ACCURACY)
+        self.text_chars = QuantileSketch(LENGTH_ACCURACY)
+
+    def add(self, output: AgentOutput, text: str = None):
+        self.n += 1
+        self.parse_errors += output.violation == "PARSE_ERROR"
+        self.violations[output.violation] += 1
+        self.enforcements[output.enforcement] += 1
+        self.latency.add(output.latency_ms)
+        if output.usage:
+            usage = output.usage
+            self.input_tokens.add(sum(usage.get(k) or 0 for k in
+                                      ("input_tokens", "cache_read_tokens", "cache_write_tokens")))
+            self.output_tokens.add(usage.get("output_tokens"))
+        if text is not None:
+            self.text_chars.add(len(text))
+
+    def to_dict(self) -> dict:
+        return {
+            "start": self.start, "n": self.n, "parse_errors": self.parse_errors,
+            "violations": dict(self.violations), "enforcements": dict(self.enforcements),
+            **{name: getattr(self, name).to_dict() for name in SKETCHES},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Pane":
+        pane = cls(data["start"])
+        pane.n, pane.parse_errors = data["n"], data["parse_errors"]
+        pane.violations, pane.enforcements = Counter(data["violations"]), Counter(data["enforcements"])
+        for name in SKETCHES:
+            setattr(pane, name, QuantileSketch.from_dict(data[name]))
+        return pane
+
+
+class Window:
+    """Merged view over a run of panes."""
+
+    def __init__(self, panes: list):
+        self.n = sum(p.n for p in panes)
+        self.parse_errors = sum(p.parse_errors for p in panes)
+        self.violations, self.enforcements = Counter(), Counter()
+        self.sketches = {name: QuantileSketch(LENGTH_ACCURACY if name != "latency" else 0.01) for name in SKETCHES}
+        for p in panes:
+            self.violations.update(p.violations)
+            self.enforcements.update(p.enforcements)
+            for name in SKETCHES:
+                self.sketches[name].merge(getattr(p, name))
+
+    @property
+    def parse_error_rate(self) -> float:
+        return self.parse_errors / self.n if self.n else 0.0
+
+    def summary(self) -> dict:
+        out = {"n": self.n, "parse_error_rate": round(self.parse_error_rate, 4),
+               "violations": dict(self.violations.most_common()),
+               "enforcements": dict(self.enforcements.most_common())}
+        for name, sketch in self.sketches.items():
+            out[name] = ({"p50": round(sketch.quantile(0.50), 1), "p95": round(sketch.quantile(0.95), 1),
+                          "mean": round(sketch.mean, 1)} if sketch.count else None)
+        return out
+
+
+def psi(current: dict, reference: dict) -> float:
+    """Population stability index between two count distributions (symmetric KL)."""
+    keys = set(current) | set(reference)
+    n_cur, n_ref = sum(current.values()), sum(reference.values())
+    if not keys or not n_cur or not n_ref:
+        return 0.0
+    total = 0.0
+    for k in keys:
+        p = max(current.get(k, 0) / n_cur, PSI_EPSILON)
+        q = max(reference.get(k, 0) / n_ref, PSI_EPSILON)
+        total += (p - q) * math.log(p / q)
+    return total
+
+
+def kl(current: dict, reference: dict) -> float:
+    """KL(current || reference) over count distributions, epsilon-smoothed."""
+    keys = set(current) | set(reference)
+    n_cur, n_ref = sum(current.values()), sum(reference.values())
+    if not keys or not n_cur or not n_ref:
+        return 0.0
+    total = 0.0
+    for k in keys:
+        p = current.get(k, 0) / n_cur
+        if p:
+            total += p * math.log(p / max(reference.get(k, 0) / n_ref, PSI_EPSILON))
+    return total
+
+
+def _sketch_counts(sketch: QuantileSketch) -> dict:
+    counts = dict(sketch.buckets)
+    if sketch.zero_count:
+        counts["zero"] = sketch.zero_count
+    return counts
+
+
+class DriftMonitor:
+    def __init__(self, pane_s: float = None, current_panes: int = None, reference_panes: int = None,
+                 min_samples: int = None, psi_threshold: float = None, parse_error_delta: float = None,
+                 latency_ratio: float = None, state_path: str = None, on_alert=None):
+        self.pane_s = pane_s or config.DRIFT_PANE_S
+        self.current_panes = current_panes or config.DRIFT_CURRENT_PANES
+        self.reference_panes = reference_panes or config.DRIFT_REFERENCE_PANES
+        self.min_samples = config.DRIFT_MIN_SAMPLES if min_samples is None else min_samples
+        self.psi_threshold = psi_threshold or config.DRIFT_PSI_THRESHOLD
+        self.parse_error_delta = parse_error_delta or config.DRIFT_PARSE_ERROR_DELTA
+        self.latency_ratio = latency_ratio or config.DRIFT_LATENCY_RATIO
+        self.state_path = state_path
+        self.on_alert = on_alert
+        self._panes = deque(maxlen=self.current_panes + self.reference_panes)
+        self.alerts = deque(maxlen=MAX_ALERTS)
+        self._firing = set()
+        self.last_check = {}
+        self._lock = threading.Lock()
+
+    def observe(self, output: AgentOutput, text: str = None, now: float = None):
+        """Record one verdict. Shed responses carry no model signal and are ignored."""
+        if output.source == "shed":
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            self._advance(now)
+            self._panes[-1].add(output, text)
+
+    def _advance(self, now: float):
+        index = int(now // self.pane_s)
+        if not self._panes:
+            self._panes.append(Pane(index * self.pane_s))
+            return
+        last = round(self._panes[-1].start / self.pane_s)
+        if index <= last:
+            return
+        self._check(now)  # the open pane just closed
+        # A long idle gap fills with empty panes, at most one full ring's worth
+        for i in range(max(last + 1, index - self._panes.maxlen + 1), index + 1):
+            self._panes.append(Pane(i * self.pane_s))
+        if self.state_path:
+            self._save(self.state_path)
+
+    def _windows(self) -> tuple:
+        panes = list(self._panes)
+        return Window(panes[-self.current_panes:]), Window(panes[:-self.current_panes])
+
+    def check(self, now: float = None) -> list:
+        """Compare current and reference windows now; returns the alerts that fired."""
+        with self._lock:
+            return self._check(time.time() if now is None else now)
+
+    def _check(self, now: float) -> list:
+        current, reference = self._windows()
+        stats = {"timestamp": now, "current_n": current.n, "reference_n": reference.n}
+        fired = []
+        if current.n < self.min_samples or reference.n < self.min_samples:
+            stats["status"] = "warming_up"
+            self.last_check = stats
+            return fired
+
+        cur_lat, ref_lat = current.sketches["latency"], reference.sketches["latency"]
+        checks = {
+            "violation_psi": (psi(current.violations, reference.violations), self.psi_threshold),
+            "enforcement_psi": (psi(current.enforcements, reference.enforcements), self.psi_threshold),
+            "parse_error_delta": (current.parse_error_rate - reference.parse_error_rate, self.parse_error_delta),
+            "latency_p95_ratio": (cur_lat.quantile(0.95) / max(ref_lat.quantile(0.95), 1e-9), self.latency_ratio),
+        }
+        for name in ("input_tokens", "output_tokens", "text_chars"):
+            cur, ref = current.sketches[name], reference.sketches[name]
+            if cur.count >= self.min_samples and ref.count >= self.min_samples:
+                checks[f"{name}_psi"] = (psi(_sketch_counts(cur), _sketch_counts(ref)), self.psi_threshold)
+        stats["violation_kl"] = round(kl(current.violations, reference.violations), 4)
+        stats["status"] = "ok"
+
+        for name, (value, threshold) in checks.items():
+            stats[name] = round(value, 4)
+            if value > threshold:
+                stats["status"] = "drift"
+                if name not in self._firing:
+                    self._firing.add(name)
+                    alert = {"timestamp": now, "metric": name, "value": round(value, 4),
+                             "threshold": threshold, "current_n": current.n, "reference_n": reference.n}
+                    self.alerts.append(alert)
+                    fired.append(alert)
+            else:
+                self._firing.discard(name)
+        self.last_check = stats
+        for alert in fired:
+            if self.on_alert is not None:
+                self.on_alert(alert)
+        return fired
+
+    def report(self) -> dict:
+        """Dashboard view: window summaries, last check, alerts and a per-pane timeline."""
+        with self._lock:
+            current, reference = self._windows()
+            return {
+                "pane_s": self.pane_s,
+                "current_window_s": self.pane_s * self.current_panes,
+                "reference_window_s": self.pane_s * self.reference_panes,
+                "current": current.summary(),
+                "reference": reference.summary(),
+                "last_check": dict(self.last_check),
+                "alerts": list(self.alerts),
+                "timeline": [{
+                    "start": p.start, "n": p.n,
+                    "parse_error_rate": round(p.parse_errors / p.n, 4) if p.n else 0.0,
+                    "action_rate": round(1 - p.enforcements.get("allow", 0) / p.n, 4) if p.n else 0.0,
+                    "p95_latency_ms": round(p.latency.quantile(0.95), 1) if p.n else None,
+                } for p in self._panes],
+            }
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return self._to_dict()
+
+    def _to_dict(self) -> dict:
+        return {
+            "settings": {
+                "pane_s": self.pane_s, "current_panes": self.current_panes,
+                "reference_panes": self.reference_panes, "min_samples": self.min_samples,
+                "psi_threshold": self.psi_threshold, "parse_error_delta": self.parse_error_delta,
+                "latency_ratio": self.latency_ratio,
+            },
+            "panes": [p.to_dict() for p in self._panes],
+            "alerts": list(self.alerts),
+            "firing": sorted(self._firing),
+            "last_check": self.last_check,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, **kwargs) -> "DriftMonitor":
+        monitor = cls(**{**data["settings"], **kwargs})
+        monitor._panes.extend(Pane.from_dict(p) for p in data["panes"])
+        monitor.alerts.extend(data["alerts"])
+        monitor._firing = set(data["firing"])
+        monitor.last_check = data["last_check"]
+        return monitor
+
+    def save(self, path: str = None):
+        with self._lock:
+            self._save(path or self.state_path or config.DRIFT_STATE_PATH)
+
+    def _save(self, path: str):
+        # Atomic: readers (the dashboard) never see a half-written file
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self._to_dict(), separators=(",", ":")))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = None, **kwargs) -> "DriftMonitor":
+        with open(path or config.DRIFT_STATE_PATH) as f:
+            return cls.from_dict(json.load(f), **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the saved online drift report.")
+    parser.add_argument("--state", default=config.DRIFT_STATE_PATH)
+    args = parser.parse_args()
+
+    report = DriftMonitor.load(args.state).report()
+    check = report["last_check"]
+    print(f"Status: {check.get('status', 'no check yet')} "
+          f"(current n={report['current']['n']}, reference n={report['reference']['n']})")
+    for key, value in check.items():
+        if key not in ("timestamp", "status", "current_n", "reference_n"):
+            print(f"   {key:<22}{value}")
+    for alert in report["alerts"][-10:]:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(alert["timestamp"]))
+        print(f"🚨 {when}  {alert['metric']} = {alert['value']} (> {alert['threshold']})")
+
+
+if __name__ == "__main__":
+    main()
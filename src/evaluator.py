@@ -2,76 +2,298 @@
 src/evaluator.py
 Runs batch evaluation of agent across a dataset.
 Returns per-case results and aggregate metrics.
+
+Cases can be scored concurrently: max_workers bounds in-flight calls and
+rps caps the request rate. Result order always matches the dataset order,
+so metrics are identical to a sequential run.
+With use_cache=True, repeat runs are served from the on-disk ResponseCache.
+With batch_size > 1, cases are packed into multi-item requests; run_stats
+records throughput per provider call for comparison with single-item runs.
+With use_rules=True, the deterministic rules tier runs first; metrics report
+the share of traffic that skipped the LLM and the rule tier's label errors.
+With use_near_dup=True, verdicts of near-identical earlier posts are reused
+(src/near_dup.py). near_dup_audit=True instead scores every case with the
+provider and checks what the index WOULD have answered, reporting hit rate,
+agreement and unsafe (less severe) reuses so the threshold can be tuned.
+With cascade=True, the small model answers first and uncertain cases are
+re-run on the strong model (see src/agent.py); metrics report the
+escalation rate, recall per tier and what recall the small model alone
+would have had. Every row is costed from config.MODEL_PRICES.
+
+With a checkpoint_path, every finished row is appended to a per-run JSONL
+file as it completes, and a rerun skips ids already present there.
+self.running holds incremental metrics that can be read at any point.
+
+Each row carries per-stage timings (queue wait, build, rate wait, network,
+retry sleep, parse) and retry counts from the call's Trace; metrics()
+aggregates them with token counts into the run log.
 """
 
+import os
+import time
+from pathlib import Path
 import jsonlines
+import numpy as np
 import pandas as pd
-import time
 from src.agent import Agent
+from src.concurrency import RateLimiter, chunked, ordered_map
+from src.near_dup import NearDuplicateIndex
+from src.response_cache import ResponseCache
+from src.rules import RulesFilter
+from src.running_metrics import RunningMetrics
+from src.schema import severity_key
+from src.tracing import Trace
+import config
+
+STAGES = ["queue_wait", "build", "rate_wait", "cache_lookup", "network", "retry_sleep", "parse"]
 
 class Evaluator:
-    def __init__(self, prompt_version: str, dataset_name: str = None, delay_s: float = 0.2):
-        self.agent = Agent(prompt_version=prompt_version)
+    def __init__(self, prompt_version: str, dataset_name: str = None, delay_s: float = 0.2,
+                 max_workers: int = 1, rps: float = None, use_cache: bool = False,
+                 batch_size: int = 1, use_rules: bool = False,
+                 limiter: RateLimiter = None, llm=None,
+                 use_near_dup: bool = False, near_dup_audit: bool = False,
+                 compact: bool = None, cascade: bool = None, strong_llm=None):
         self.version = prompt_version
         self.dataset_name = dataset_name
         self.delay_s = delay_s
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.run_stats = {}
+        self.running = RunningMetrics()
+        # Without an explicit rate, fall back to the legacy per-call delay as a rate cap
+        if rps is None and delay_s and delay_s > 0:
+            rps = 1.0 / delay_s
+        self.limiter = limiter or RateLimiter(rps)
+        # Audit mode keeps its own shadow index; the agent never reuses verdicts
+        self.shadow_index = NearDuplicateIndex() if near_dup_audit else None
+        self.agent = Agent(
+            prompt_version=prompt_version,
+            cache=ResponseCache() if use_cache else None,
+            limiter=self.limiter,
+            rules=RulesFilter() if use_rules else None,
+            llm=llm,
+            near_dup=NearDuplicateIndex() if use_near_dup and not near_dup_audit else None,
+            compact=compact,
+            cascade=cascade,
+            strong_llm=strong_llm
+        )
+
+    def run(self, data_path: str, checkpoint_path: str = None, collect: bool = True) -> pd.DataFrame:
+        """
+        Score every case in data_path.
+        checkpoint_path: append-only JSONL of finished rows; existing ids are skipped.
+        collect=False: do not keep rows in memory and return None (read
+        self.running.snapshot() or the checkpoint file instead).
+        """
+        start = time.perf_counter()
+        before = {**self.agent.stats, **self.agent.llm.stats}
+        self.running = RunningMetrics()
+        done_ids = self._resume(checkpoint_path) if checkpoint_path else set()
 
-    def run(self, data_path: str) -> pd.DataFrame:
-        results = []
-        with jsonlines.open(data_path) as reader:
-            for case in reader:
-                output = self.agent.classify(case["text"])
-                results.append({
-                    "id": case["id"],
-                    "text": case["text"],
-                    "true_label": case["label"],
-                    "true_severity": case["severity"],
-                    "pred_label": output.label,
-                    "pred_category": output.category,
-                    "pred_violation": output.violation,
-                    "pred_severity": output.severity,
-                    "pred_enforcement": output.enforcement,
-                    "rationale": output.rationale,
-                    "prompt_version": self.version,
-                    "latency_ms": output.latency_ms,
-                    "correct": int(output.label == case["label"]),
-                    "is_fn": int(case["label"] == 1 and output.label == 0),
-                    "is_fp": int(case["label"] == 0 and output.label == 1),
-                })
-                time.sleep(self.delay_s)
+        results, scored = [], 0
+        writer = jsonlines.open(checkpoint_path, "a", flush=True) if checkpoint_path else None
+        try:
+            with jsonlines.open(data_path) as reader:
+                for row in self._iter_rows(c for c in reader if c["id"] not in done_ids):
+                    self.running.update(row)
+                    if writer is not None:
+                        writer.write(row)
+                    if collect and writer is None:
+                        results.append(row)
+                    scored += 1
+        finally:
+            if writer is not None:
+                writer.close()
+        self.run_stats = self._run_stats(scored, time.perf_counter() - start, before)
+
+        if not collect:
+            return None
+        if checkpoint_path:
+            with jsonlines.open(checkpoint_path) as reader:
+                results = list(reader.iter(skip_invalid=True))
         return pd.DataFrame(results)
 
-    def metrics(self, df: pd.DataFrame) -> dict:
-        tp = len(df[(df.true_label==1) & (df.pred_label==1)])
-        fp = len(df[(df.true_label==0) & (df.pred_label==1)])
-        fn = len(df[(df.true_label==1) & (df.pred_label==0)])
-        tn = len(df[(df.true_label==0) & (df.pred_label==0)])
+    def _iter_rows(self, cases):
+        # Jobs are stamped as the pool pulls them, so queue wait = start - stamp
+        if self.batch_size > 1:
+            jobs = ((chunk, time.perf_counter()) for chunk in chunked(cases, self.batch_size))
+            for batch in ordered_map(lambda job: self.score_batch(*job), jobs, self.max_workers):
+                yield from batch
+        else:
+            jobs = ((case, time.perf_counter()) for case in cases)
+            yield from ordered_map(lambda job: self.score(*job), jobs, self.max_workers)
+
+    def _resume(self, checkpoint_path: str) -> set:
+        """Replay an existing checkpoint into running metrics; return its ids."""
+        path = Path(checkpoint_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        done = set()
+        if path.exists():
+            # A crash can leave a torn last line; cut it so appends start on a
+            # fresh line, and rescore that case
+            _truncate_torn_tail(path)
+            with jsonlines.open(path) as reader:
+                for row in reader.iter(skip_invalid=True):
+                    if row["id"] not in done:
+                        done.add(row["id"])
+                        self.running.update(row)
+        return done
+
+    def score(self, case: dict, submitted_at: float = None) -> dict:
+        """One result row for a case. submitted_at: perf_counter stamp when the job was queued."""
+        shadow = self._shadow_lookup(case)
+        output = self.agent.classify(case["text"], trace=self._trace(submitted_at))
+        return self._audit(self._row(case, output), case, output, shadow)
+
+    def score_batch(self, cases: list, submitted_at: float = None) -> list:
+        """Result rows for several cases scored with one classify_batch request."""
+        trace = self._trace(submitted_at, "classify_batch")
+        shadows = [self._shadow_lookup(case) for case in cases]
+        outputs = self.agent.classify_batch([case["text"] for case in cases], trace=trace)
+        return [self._audit(self._row(case, output), case, output, shadow)
+                for case, output, shadow in zip(cases, outputs, shadows)]
+
+    def _shadow_lookup(self, case: dict):
+        return self.shadow_index.lookup(case["text"]) if self.shadow_index is not None else None
+
+    def _audit(self, row: dict, case: dict, output, shadow) -> dict:
+        """Near-dup audit columns: would the index have answered, and was it right?"""
+        if self.shadow_index is None:
+            return row
+        self.shadow_index.add(case["text"], output)
+        reused = shadow[0] if shadow is not None else None
+        fresh = {"label": output.label, "severity": output.severity, "enforcement": output.enforcement}
+        row["near_dup_hit"] = int(reused is not None)
+        row["near_dup_similarity"] = round(shadow[1], 4) if shadow is not None else None
+        row["near_dup_agree"] = int(reused["enforcement"] == output.enforcement) if reused else None
+        row["near_dup_unsafe"] = int(severity_key(reused) < severity_key(fresh)) if reused else None
+        return row
+
+    def _trace(self, submitted_at: float, name: str = "classify") -> Trace:
+        trace = Trace(name, prompt_version=self.version, dataset=self.dataset_name or "")
+        if submitted_at is not None:
+            queued_ms = (time.perf_counter() - submitted_at) * 1000
+            trace.add("queue_wait", queued_ms, offset_ms=-queued_ms)
+        return trace
+
+    def _run_stats(self, n_cases: int, wall_s: float, before: dict) -> dict:
+        calls = self.agent.stats["llm_calls"] - before["llm_calls"]
+        chars = self.agent.stats["prompt_chars"] - before["prompt_chars"]
+        return {
+            "cases": n_cases,
+            "batch_size": self.batch_size,
+            "wall_time_s": round(wall_s, 3),
+            "cases_per_s": round(n_cases / wall_s, 2) if wall_s > 0 else 0,
+            "llm_calls": calls,
+            "cases_per_call": round(n_cases / calls, 2) if calls else 0,
+            "prompt_chars_per_case": round(chars / n_cases, 1) if n_cases else 0,
+            "escalations": self.agent.stats["escalations"] - before["escalations"],
+            **{k: self.agent.llm.stats[k] - before[k]
+               for k in ("hedges", "hedge_wins", "failovers", "deadline_exceeded")},
+        }
+
+    def _row(self, case: dict, output) -> dict:
+        return {
+            "id": case["id"],
+            "text": case["text"],
+            "true_label": case["label"],
+            "true_severity": case["severity"],
+            "true_category": case.get("category"),
+            "true_violation": case.get("violation"),
+            "pred_label": output.label,
+            "pred_category": output.category,
+            "pred_violation": output.violation,
+            "pred_severity": output.severity,
+            "pred_enforcement": output.enforcement,
+            "rationale": output.rationale,
+            "prompt_version": self.version,
+            "latency_ms": output.latency_ms,
+            "ttft_ms": output.ttft_ms,
+            "input_tokens": (output.usage or {}).get("input_tokens"),
+            "cache_read_tokens": (output.usage or {}).get("cache_read_tokens"),
+            "output_tokens": (output.usage or {}).get("output_tokens"),
+            "source": output.source,
+            "confidence": output.confidence,
+            "cost_usd": self._cost_usd(output),
+            **self._cascade_columns(output),
+            **_stage_columns(output.trace),
+            "correct": int(output.label == case["label"]),
+            "is_fn": int(case["label"] == 1 and output.label == 0),
+            "is_fp": int(case["label"] == 0 and output.label == 1),
+        }
+
+    def _cost_usd(self, output):
+        if output.cascade is None:
+            return _call_cost_usd(output.usage, self.agent.llm.model)
+        costs = [_call_cost_usd(t["usage"], t["model"]) for t in output.cascade["tiers"]]
+        return None if None in costs else round(sum(costs), 8)
+
+    def _cascade_columns(self, output) -> dict:
+        if not self.agent.cascade:
+            return {}
+        info = output.cascade or {}
+        tiers = {t["tier"]: t for t in info.get("tiers", [])}
+        small = tiers.get("small")
+        if "strong" in tiers:
+            tier = "strong"
+        elif small is not None:
+            tier = "unresolved" if info.get("escalated") else "small"
+        else:
+            tier = output.source  # rules / near_dup shortcut
+        return {
+            "tier": tier,
+            "escalated": int(bool(info.get("escalated"))),
+            "escalation_reason": info.get("reason"),
+            "small_label": small["label"] if small else output.label,
+            "small_severity": small["severity"] if small else output.severity,
+            "small_latency_ms": small["latency_ms"] if small else None,
+            "strong_latency_ms": tiers["strong"]["latency_ms"] if "strong" in tiers else None,
+        }
+
+    def metrics(self, df: pd.DataFrame, n_boot: int = 2000, seed: int = 0) -> dict:
+        """
+        Aggregate metrics in one vectorized pass over label/severity arrays,
+        with per-category / per-violation breakdowns and bootstrap 95% CIs
+        for recall and high-severity recall.
+        """
+        true_pos = df.true_label.to_numpy() == 1
+        true_neg = df.true_label.to_numpy() == 0
+        pred_pos = df.pred_label.to_numpy() == 1
+        pred_neg = df.pred_label.to_numpy() == 0
+        high = (df.true_severity == "high").to_numpy()
+
+        # Confusion cells encoded as 2*truth + prediction: tn=0, fp=1, fn=2, tp=3
+        valid = (true_pos | true_neg) & (pred_pos | pred_neg)
+        cells = np.bincount((2 * true_pos + pred_pos)[valid], minlength=4)
+        tn, fp, fn, tp = (int(c) for c in cells)
 
         precision = tp / (tp + fp) if (tp + fp) > 0 else 0
         recall    = tp / (tp + fn) if (tp + fn) > 0 else 0
         f1        = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
 
-        high_df = df[df.true_severity == "high"]
-        high_recall = (
-            len(high_df[high_df.pred_label==1]) / len(high_df)
-            if len(high_df) > 0 else 0
-        )
+        high_count = int(high.sum())
+        high_caught = int((high & pred_pos).sum())
+        high_recall = high_caught / high_count if high_count > 0 else 0
+        high_severity_fn_count = int((high & true_pos & pred_neg).sum())
 
-        high_severity_fn_count = int(
-            len(df[
-                (df.true_severity == "high") &
-                (df.true_label == 1) &
-                (df.pred_label == 0)
-            ])
-        )
+        parse_error_count = int((df.pred_violation == "PARSE_ERROR").sum())
 
-        parse_error_count = int(
-            len(df[df.pred_violation == "PARSE_ERROR"])
-        )
+        ruled = (df.source == "rules").to_numpy() if "source" in df else np.zeros(len(df), bool)
+        rules_fn_count = int((ruled & true_pos & pred_neg).sum())
+        rules_fp_count = int((ruled & true_neg & pred_pos).sum())
+        positives = tp + fn
+
+        rng = np.random.default_rng(seed)
+        latency = df.latency_ms.to_numpy(dtype=float)
+        p50, p95 = np.nanquantile(latency, [0.50, 0.95]) if len(df) else (np.nan, np.nan)
 
         return {
             "prompt_version": self.version,
             "dataset": self.dataset_name,
+            "verdict_mode": "compact" if self.agent.compact else "full",
+            "model": self.agent.llm.model,
+            "strong_model": self.agent.strong_llm.model if self.agent.cascade else None,
             "dataset_size": len(df),
             "precision": round(precision, 4),
             "recall": round(recall, 4),
@@ -79,7 +301,168 @@ class Evaluator:
             "high_severity_recall": round(high_recall, 4),
             "high_severity_fn_count": high_severity_fn_count,
             "parse_error_count": parse_error_count,
+            "rules_skip_rate": round(int(ruled.sum()) / len(df), 4) if len(df) else 0,
+            "rules_fn_count": rules_fn_count,
+            "rules_fp_count": rules_fp_count,
+            # Upper bound on recall lost to the rules tier (its FNs over all positives)
+            "rules_recall_cost": round(rules_fn_count / positives, 4) if positives else 0,
+            **_near_dup_metrics(df, true_pos & pred_neg),
             "tp": tp, "fp": fp, "fn": fn, "tn": tn,
-            "p50_latency_ms": round(df.latency_ms.quantile(0.50), 1),
-            "p95_latency_ms": round(df.latency_ms.quantile(0.95), 1),
+            "p50_latency_ms": round(float(p50), 1),
+            "p95_latency_ms": round(float(p95), 1),
+            "mean_latency_ms": round(float(np.nanmean(latency)), 1) if len(df) else None,
+            "mean_cost_usd": _mean(df, "cost_usd", 8),
+            **_cascade_metrics(df, true_pos, high, high_recall),
+            "p50_ttft_ms": _quantile(df, "ttft_ms", 0.50),
+            "p95_ttft_ms": _quantile(df, "ttft_ms", 0.95),
+            **_token_totals(df),
+            "retries": int(pd.to_numeric(df["retries"], errors="coerce").sum()) if "retries" in df else 0,
+            "stage_p50_ms": {st: _quantile(df, f"{st}_ms", 0.50) for st in STAGES},
+            "stage_p95_ms": {st: _quantile(df, f"{st}_ms", 0.95) for st in STAGES},
+            "recall_ci": _bootstrap_ci(tp, positives, n_boot, rng),
+            "high_severity_recall_ci": _bootstrap_ci(high_caught, high_count, n_boot, rng),
+            "by_category": _breakdown(df, "true_category", true_pos, true_neg, pred_pos, pred_neg),
+            "by_violation": _breakdown(df, "true_violation", true_pos, true_neg, pred_pos, pred_neg),
+        }
+
+
+def _truncate_torn_tail(path: Path, block: int = 1 << 16):
+    """Cut a checkpoint back to its last newline so the next append starts a fresh line."""
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            cut = chunk.rfind(b"\n")
+            if cut != -1:
+                pos = start + cut + 1
+                break
+            pos = start
+        if pos != end:
+            f.truncate(pos)
+
+
+def _quantile(df: pd.DataFrame, column: str, q: float):
+    """Quantile of an optional numeric column; None when absent or all-missing."""
+    if column not in df:
+        return None
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+    values = values[~np.isnan(values)]
+    return round(float(np.quantile(values, q)), 1) if len(values) else None
+
+
+def _mean(df: pd.DataFrame, column: str, digits: int = 1):
+    """Mean of an optional numeric column; None when absent or all-missing."""
+    if column not in df:
+        return None
+    values = pd.to_numeric(df[column], errors="coerce")
+    return round(float(values.mean()), digits) if values.notna().any() else None
+
+
+def _call_cost_usd(usage: dict, model: str):
+    """USD for one provider call from config.MODEL_PRICES (cache writes at the input price)."""
+    prices = config.MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    usage = usage or {}  # cache hits and shortcut verdicts made no provider call
+    input_price, cache_read_price, output_price = prices
+    uncached = (usage.get("input_tokens") or 0) + (usage.get("cache_write_tokens") or 0)
+    return (uncached * input_price + (usage.get("cache_read_tokens") or 0) * cache_read_price
+            + (usage.get("output_tokens") or 0) * output_price) / 1e6
+
+
+def _cascade_metrics(df: pd.DataFrame, true_pos, high, high_recall: float) -> dict:
+    """Escalation share and recall per tier; small_tier_* is recall had no case escalated."""
+    if "escalated" not in df:
+        return {}
+    escalated = df.escalated.to_numpy() == 1
+    small_pos = df.small_label.to_numpy() == 1
+    final_pos = df.pred_label.to_numpy() == 1
+    tier = df.tier.to_numpy()
+
+    def recall(pred, mask):
+        positives = true_pos & mask
+        return round(float((pred & positives).sum() / positives.sum()), 4) if positives.any() else None
+
+    return {
+        "escalation_rate": round(float(escalated.mean()), 4) if len(df) else 0,
+        "escalation_reasons": {str(k): int(v) for k, v in df.escalation_reason[escalated].value_counts().items()},
+        "small_tier_recall": recall(small_pos, np.ones(len(df), bool)),
+        "small_tier_high_severity_recall": recall(small_pos, high),
+        "recall_by_tier": {str(t): recall(final_pos, tier == t) for t in pd.unique(tier)},
+        "cases_by_tier": {str(k): int(v) for k, v in df.tier.value_counts().items()},
+        "strong_tier_catches": int((escalated & true_pos & ~small_pos & final_pos).sum()),
+        "mean_small_latency_ms": _mean(df, "small_latency_ms"),
+        "mean_strong_latency_ms": _mean(df, "strong_latency_ms"),
+        "high_severity_recall_ok": bool(high_recall >= config.HIGH_SEVERITY_RECALL_THRESHOLD),
+    }
+
+
+def _stage_columns(trace: dict) -> dict:
+    """Flatten a trace summary into per-stage millisecond columns."""
+    stages = (trace or {}).get("stages", {})
+    columns = {f"{st}_ms": stages.get(st) for st in STAGES}
+    columns["retries"] = (trace or {}).get("retries", 0)
+    return columns
+
+
+def _near_dup_metrics(df: pd.DataFrame, missed) -> dict:
+    """Reuse share and safety: live (source == near_dup) or shadow-audited (near_dup_* columns)."""
+    if "near_dup_hit" in df:
+        hits = df.near_dup_hit.to_numpy() == 1
+        return {
+            "near_dup_hit_rate": round(float(hits.mean()), 4) if len(df) else 0,
+            "near_dup_agreement": round(float(df.near_dup_agree[hits].mean()), 4) if hits.any() else None,
+            "near_dup_unsafe_count": int(df.near_dup_unsafe[hits].sum()),
+        }
+    reused = (df.source == "near_dup").to_numpy() if "source" in df else np.zeros(len(df), bool)
+    return {
+        "near_dup_hit_rate": round(float(reused.mean()), 4) if len(df) else 0,
+        "near_dup_fn_count": int((reused & missed).sum()),
+    }
+
+
+def _token_totals(df: pd.DataFrame) -> dict:
+    """Summed provider tokens and the share of input tokens served from prompt cache."""
+    totals = {}
+    for column in ("input_tokens", "cache_read_tokens", "output_tokens"):
+        values = pd.to_numeric(df[column], errors="coerce") if column in df else pd.Series(dtype=float)
+        totals[column] = int(round(values.sum()))
+    prompt_tokens = totals["input_tokens"] + totals["cache_read_tokens"]
+    totals["cache_read_ratio"] = round(totals["cache_read_tokens"] / prompt_tokens, 4) if prompt_tokens else 0
+    return totals
+
+
+def _bootstrap_ci(successes: int, n: int, n_boot: int, rng, level: float = 0.95) -> list:
+    """
+    Percentile bootstrap CI for a proportion. Resampling n Bernoulli outcomes
+    with replacement is a Binomial(n, p_hat) draw, so all resamples are drawn
+    in one vectorized call instead of materializing index matrices.
+    """
+    if n == 0 or n_boot <= 0:
+        return [0.0, 0.0]
+    draws = rng.binomial(n, successes / n, size=n_boot) / n
+    lo, hi = np.quantile(draws, [(1 - level) / 2, (1 + level) / 2])
+    return [round(float(lo), 4), round(float(hi), 4)]
+
+
+def _breakdown(df: pd.DataFrame, column: str, true_pos, true_neg, pred_pos, pred_neg) -> dict:
+    """Per-group counts and recall via one factorize + bincount per statistic."""
+    if column not in df:
+        return {}
+    codes, groups = df[column].factorize(use_na_sentinel=False)
+    k = len(groups)
+    n = np.bincount(codes, minlength=k)
+    tp = np.bincount(codes, weights=true_pos & pred_pos, minlength=k)
+    fn = np.bincount(codes, weights=true_pos & pred_neg, minlength=k)
+    fp = np.bincount(codes, weights=true_neg & pred_pos, minlength=k)
+    out = {}
+    for i, group in enumerate(groups):
+        pos = tp[i] + fn[i]
+        out[str(group)] = {
+            "n": int(n[i]), "tp": int(tp[i]), "fn": int(fn[i]), "fp": int(fp[i]),
+            "recall": round(float(tp[i] / pos), 4) if pos else None,
         }
+    return out
@@ -0,0 +1,76 @@
+"""
+src/json_stream.py
+Incremental scanner for the first top-level JSON object (or array) in a
+text stream. Tracks brace depth, string and escape state char by char, so
+a streaming caller knows the exact moment the verdict is complete and can
+stop reading — and chatty text before or after the JSON is ignored.
+
+A balanced fragment that does not decode (e.g. "Per policy [section 2],"
+ahead of the verdict) is discarded and scanning resumes after it. Callers
+that know the shape they expect pass openers="{" or "[" so prose
+brackets are never taken for the answer.
+"""
+
+import json
+
+
+class JsonObjectScanner:
+    def __init__(self, openers: str = "{["):
+        self.openers = openers
+        self.result = None
+        self._restart()
+
+    def _restart(self):
+        self.buffer = []
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk. Returns the complete JSON text once closed, else None."""
+        if self.done:
+            return self.result
+        for ch in chunk:
+            if not self.started:
+                if ch not in self.openers:
+                    continue
+                self.started = True
+            self.buffer.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    candidate = "".join(self.buffer)
+                    if _decodes(candidate):
+                        self.result = candidate
+                        return self.result
+                    self._restart()
+        return None
+
+
+def _decodes(text: str) -> bool:
+    try:
+        json.loads(text)
+    except json.JSONDecodeError:
+        return False
+    return True
+
+
+def extract_first_object(text: str, openers: str = "{") -> str:
+    """Return the first balanced top-level JSON object in text, or None."""
+    return JsonObjectScanner(openers).feed(text)
@@ -2,70 +2,511 @@
 src/llm_client.py
 Provider-flexible LLM wrapper.
 Retry with exponential backoff on overload and rate limit errors.
+
+One provider client (sync and async) is created lazily per LLMClient and
+reused across calls and threads, so the HTTP connection pool and TLS
+session survive between classifications.
+
+With stream=True the provider's streaming API is used: chunks feed an
+incremental JSON scanner and the stream is closed as soon as the verdict
+object is complete. Time-to-first-token and time-to-verdict are recorded.
+
+A static prompt prefix can be passed as `system`: Anthropic receives it as a
+cache_control system block, OpenAI as a system message (automatic prefix
+caching). Token usage, split into cache-read and uncached input, is
+returned on every LLMResponse.
+
+provider="local" routes to the in-process SimulatedProvider (offline tests).
+
+Tail-latency controls:
+  - deadline_ms bounds a whole complete() call, retries included; when it
+    runs out DeadlineExceeded is raised instead of sleeping past it
+  - with LLM_HEDGE=1, an attempt still running after the rolling p95 of
+    recent latencies gets a duplicate request and the first success wins
+    (hedges are capped at LLM_HEDGE_MAX_RATIO of calls)
+  - retries back off with jitter and honour the provider's retry-after
+  - a CircuitBreaker per client; while open, calls fail over to
+    LLM_FALLBACK_PROVIDER / LLM_FALLBACK_MODEL, as do calls whose retries
+    are exhausted
+self.stats counts calls, hedges, hedge wins, failovers, deadline misses
+and breaker openings.
 """
 
 import os
+import random
+import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 import config
+from src.json_stream import JsonObjectScanner
+from src.tracing import Trace
+
+RETRYABLE_TERMS = ["overloaded", "rate", "429", "529"]
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    latency_ms: float            # full call (or until the verdict closed, when streaming)
+    ttft_ms: float = None        # streaming only: first text chunk
+    verdict_ms: float = None     # streaming only: top-level JSON closed
+    usage: dict = None           # input_tokens (uncached), cache_read_tokens, cache_write_tokens, output_tokens
+    failover: bool = False       # served by the fallback provider/model
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's deadline ran out before a response arrived."""
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures. After reset_timeout_s
+    one probe call is let through (half-open); its outcome closes or re-opens.
+    """
+
+    def __init__(self, failure_threshold: int = None, reset_timeout_s: float = None):
+        self.failure_threshold = failure_threshold or config.LLM_BREAKER_FAILURES
+        self.reset_timeout_s = config.LLM_BREAKER_RESET_S if reset_timeout_s is None else reset_timeout_s
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+
+    def record_failure(self) -> bool:
+        """Returns True when this failure opened the breaker."""
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self._failures >= self.failure_threshold):
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
 
 class LLMClient:
-    def __init__(self, provider: str = None, model: str = None):
+    def __init__(self, provider: str = None, model: str = None, stream: bool = None,
+                 fallback: "LLMClient" = None, hedge: bool = None):
         self.provider = provider or config.LLM_PROVIDER
         self.model = model or config.LLM_MODEL
+        self.stream = config.LLM_STREAM if stream is None else stream
+        self.hedge = config.LLM_HEDGE if hedge is None else hedge
+        # fallback=None → from config; fallback=False → none
+        if fallback is None and config.LLM_FALLBACK_PROVIDER:
+            fallback_model = config.LLM_FALLBACK_MODEL or self.model
+            if (config.LLM_FALLBACK_PROVIDER, fallback_model) != (self.provider, self.model):
+                fallback = LLMClient(config.LLM_FALLBACK_PROVIDER, fallback_model,
+                                     stream=self.stream, fallback=False, hedge=False)
+        self.fallback = fallback or None
+        self.breaker = CircuitBreaker()
+        self.stats = {"calls": 0, "hedges": 0, "hedge_wins": 0, "failovers": 0,
+                      "deadline_exceeded": 0, "breaker_opens": 0}
+        self._latencies = deque(maxlen=config.LLM_HEDGE_WINDOW)
+        self._client = None
+        self._async_client = None
+        self._pool = None
+        self._lock = threading.Lock()
 
-    def generate(self, prompt: str) -> tuple:
+    def generate(self, prompt: str, max_tokens: int = None) -> tuple:
+        response = self.complete(prompt, max_tokens=max_tokens)
+        return response.text, response.latency_ms
+
+    def complete(self, prompt: str, max_tokens: int = None, system: str = None,
+                 trace: Trace = None, deadline_ms: float = None, openers: str = "{[") -> LLMResponse:
+        """
+        prompt: the per-item (user) part. system: optional static prefix,
+        sent so the provider can serve it from its prompt cache.
+        trace: optional Trace receiving one "network" span per attempt and
+        "retry_sleep" spans for backoff.
+        deadline_ms: budget for the whole call, retries and failover included.
+        openers: JSON shape expected in the reply when streaming ("{" for one
+        verdict, "[" for a batch); the stream closes on the first such value.
+        """
+        trace = trace or Trace()
+        max_tokens = max_tokens or config.MAX_TOKENS
+        deadline = time.perf_counter() + deadline_ms / 1000 if deadline_ms else None
+        self._count("calls")
+        if self.fallback is not None and not self.breaker.allow():
+            return self._failover(prompt, max_tokens, system, trace, deadline, openers)
+        try:
+            return self._complete_with_retries(prompt, max_tokens, system, trace, deadline, openers)
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            if self.fallback is None:
+                raise
+            return self._failover(prompt, max_tokens, system, trace, deadline, openers)
+
+    def _complete_with_retries(self, prompt: str, max_tokens: int, system: str,
+                               trace: Trace, deadline: float, openers: str) -> LLMResponse:
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                response = self._attempt(prompt, max_tokens, system, trace, attempt + 1, deadline, openers)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if self.breaker.record_failure():
+                    self._count("breaker_opens")
+                if self._is_retryable(e) and attempt < max_retries - 1:
+                    wait_time = self._backoff(attempt, e)
+                    remaining = _remaining_s(deadline)
+                    if remaining is not None and wait_time >= remaining:
+                        self._count("deadline_exceeded")
+                        raise DeadlineExceeded(
+                            f"retry in {wait_time:.1f}s would pass the deadline ({remaining:.1f}s left)"
+                        ) from e
+                    trace.retries += 1
+                    print(f"   ⚠️ Retrying in {wait_time:.1f}s (attempt {attempt+1})")
+                    with trace.span("retry_sleep", attempt=attempt + 1):
+                        time.sleep(wait_time)
+                else:
+                    raise
+            else:
+                self.breaker.record_success()
+                with self._lock:
+                    self._latencies.append(response.latency_ms)
+                return response
+
+    def _attempt(self, prompt: str, max_tokens: int, system: str, trace: Trace,
+                 attempt: int, deadline: float, openers: str) -> LLMResponse:
+        """One attempt, bounded by the deadline and hedged once the p95 delay passes."""
+        hedge_s = self._hedge_delay_s()
+        if deadline is None and hedge_s is None:
+            with trace.span("network", attempt=attempt, provider=self.provider):
+                return self._complete_once(prompt, max_tokens, system, openers)
+
+        start = time.perf_counter()
+        pool = self._get_pool()
+        pending = {pool.submit(self._complete_once, prompt, max_tokens, system, openers): "primary"}
+        hedged, error = False, None
+        try:
+            while pending:
+                timeout = _remaining_s(deadline)
+                if hedge_s is not None and not hedged:
+                    until_hedge = max(0.0, start + hedge_s - time.perf_counter())
+                    timeout = until_hedge if timeout is None else min(timeout, until_hedge)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    label = pending.pop(future)
+                    if future.exception() is None:
+                        if label == "hedge":
+                            self._count("hedge_wins")
+                        response = future.result()
+                        # Latency as the caller saw it, from the primary's submission
+                        response.latency_ms = (time.perf_counter() - start) * 1000
+                        return response
+                    error = future.exception()
+                if done:
+                    continue
+                if deadline is not None and time.perf_counter() >= deadline:
+                    self._count("deadline_exceeded")
+                    raise DeadlineExceeded(f"no response from {self.provider} within the deadline")
+                # Slower than the rolling p95: race a duplicate request (losers run to completion)
+                hedged = True
+                self._count("hedges")
+                pending[pool.submit(self._complete_once, prompt, max_tokens, system, openers)] = "hedge"
+            raise error
+        finally:
+            trace.add("network", (time.perf_counter() - start) * 1000,
+                      attempt=attempt, provider=self.provider, hedged=hedged)
+
+    def _failover(self, prompt: str, max_tokens: int, system: str, trace: Trace,
+                  deadline: float, openers: str) -> LLMResponse:
+        self._count("failovers")
+        remaining = _remaining_s(deadline)
+        if remaining is not None and remaining <= 0:
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded("deadline passed before failover")
+        print(f"   ↪️ Failing over to {self.fallback.provider}/{self.fallback.model} "
+              f"(breaker {self.breaker.state})")
+        response = self.fallback.complete(
+            prompt, max_tokens, system, trace,
+            deadline_ms=remaining * 1000 if remaining is not None else None, openers=openers
+        )
+        response.failover = True
+        return response
+
+    def _hedge_delay_s(self):
+        """Rolling p95 of recent latencies, or None while hedging is off, warming up or over budget."""
+        if not self.hedge:
+            return None
+        with self._lock:
+            if len(self._latencies) < config.LLM_HEDGE_MIN_SAMPLES:
+                return None
+            if self.stats["hedges"] >= config.LLM_HEDGE_MAX_RATIO * self.stats["calls"]:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))] / 1000
+
+    def _backoff(self, attempt: int, e: Exception) -> float:
+        # Equal jitter around 2**attempt, never shorter than the provider's retry-after
+        base = 2 ** attempt
+        wait_time = base / 2 + random.uniform(0, base / 2)
+        retry_after = _retry_after_s(e)
+        return max(wait_time, retry_after) if retry_after is not None else wait_time
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _complete_once(self, prompt: str, max_tokens: int, system: str, openers: str) -> LLMResponse:
+        start = time.perf_counter()
+        if self.stream:
+            return self._complete_stream(prompt, max_tokens, system, start, openers)
+        if self.provider == "anthropic":
+            text, usage = self._call_anthropic(prompt, max_tokens, system)
+        elif self.provider == "openai":
+            text, usage = self._call_openai(prompt, max_tokens, system)
+        elif self.provider == "local":
+            text, usage = self._get_client().complete(prompt, max_tokens, system)
+        else:
+            raise ValueError(f"Unsupported provider: {self.provider}")
+        text = self._clean_response(text)
+        latency_ms = (time.perf_counter() - start) * 1000
+        return LLMResponse(text, latency_ms, usage=usage)
+
+    async def agenerate(self, prompt: str, max_tokens: int = None, system: str = None) -> tuple:
+        """Async variant of generate() backed by the providers' async clients."""
+        import asyncio  # only async callers pay for it
+        max_tokens = max_tokens or config.MAX_TOKENS
         max_retries = 3
         for attempt in range(max_retries):
             try:
                 start = time.perf_counter()
                 if self.provider == "anthropic":
-                    text = self._call_anthropic(prompt)
+                    text = await self._acall_anthropic(prompt, max_tokens, system)
                 elif self.provider == "openai":
-                    text = self._call_openai(prompt)
+                    text = await self._acall_openai(prompt, max_tokens, system)
+                elif self.provider == "local":
+                    text, _ = await asyncio.to_thread(
+                        self._get_client().complete, prompt, max_tokens, system
+                    )
                 else:
                     raise ValueError(f"Unsupported provider: {self.provider}")
                 text = self._clean_response(text)
                 latency_ms = (time.perf_counter() - start) * 1000
                 return text, latency_ms
             except Exception as e:
-                if any(term in str(e).lower() for term in ["overloaded", "rate", "429", "529"]):
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        print(f"   ⚠️ Retrying in {wait_time}s (attempt {attempt+1})")
-                        time.sleep(wait_time)
-                    else:
-                        raise
+                if self._is_retryable(e) and attempt < max_retries - 1:
+                    wait_time = self._backoff(attempt, e)
+                    print(f"   ⚠️ Retrying in {wait_time:.1f}s (attempt {attempt+1})")
+                    await asyncio.sleep(wait_time)
                 else:
                     raise
 
+    def _complete_stream(self, prompt: str, max_tokens: int, system: str, start: float,
+                         openers: str) -> LLMResponse:
+        usage = {}  # filled by the stream as usage events arrive
+        if self.provider == "anthropic":
+            chunks = self._stream_anthropic(prompt, max_tokens, system, usage)
+        elif self.provider == "openai":
+            chunks = self._stream_openai(prompt, max_tokens, system, usage)
+        elif self.provider == "local":
+            chunks = self._get_client().stream(prompt, max_tokens, system, usage)
+        else:
+            raise ValueError(f"Unsupported provider: {self.provider}")
+
+        scanner = JsonObjectScanner(openers)
+        parts, ttft_ms, verdict = [], None, None
+        try:
+            for chunk in chunks:
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - start) * 1000
+                parts.append(chunk)
+                verdict = scanner.feed(chunk)
+                if verdict is not None:
+                    break
+        finally:
+            chunks.close()  # closes the underlying HTTP stream on early exit
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        # Trailing chatter after the verdict is dropped; without a verdict keep
+        # everything so the parser can apply its own fallback
+        text = verdict if verdict is not None else self._clean_response("".join(parts))
+        return LLMResponse(
+            text, elapsed_ms, ttft_ms=ttft_ms,
+            verdict_ms=elapsed_ms if verdict is not None else None,
+            usage=usage or None
+        )
+
+    def _is_retryable(self, e: Exception) -> bool:
+        return any(term in str(e).lower() for term in RETRYABLE_TERMS)
+
     def _clean_response(self, text: str) -> str:
         text = text.strip()
         if text.startswith("```"):
             text = text.replace("```json", "").replace("```", "").strip()
         return text
 
-    def _call_anthropic(self, prompt: str) -> str:
-        if "ANTHROPIC_API_KEY" not in os.environ:
-            raise EnvironmentError("ANTHROPIC_API_KEY not set")
-        import anthropic
-        client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-        response = client.messages.create(
+    # ── Provider clients (created once, shared across calls/threads) ────────
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._make_client(async_=False)
+        return self._client
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = self._make_client(async_=True)
+        return self._async_client
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Runs attempts that need a deadline or a hedge; sized for hedges on top of callers
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=config.LLM_CALL_THREADS,
+                                                    thread_name_prefix="llm-call")
+        return self._pool
+
+    def _make_client(self, async_: bool):
+        if self.provider == "anthropic":
+            if "ANTHROPIC_API_KEY" not in os.environ:
+                raise EnvironmentError("ANTHROPIC_API_KEY not set")
+            import anthropic
+            cls = anthropic.AsyncAnthropic if async_ else anthropic.Anthropic
+            return cls(api_key=os.environ["ANTHROPIC_API_KEY"])
+        if self.provider == "openai":
+            if "OPENAI_API_KEY" not in os.environ:
+                raise EnvironmentError("OPENAI_API_KEY not set")
+            import openai
+            cls = openai.AsyncOpenAI if async_ else openai.OpenAI
+            return cls(api_key=os.environ["OPENAI_API_KEY"])
+        if self.provider == "local":
+            from src.sim_provider import SimulatedProvider
+            return SimulatedProvider()
+        raise ValueError(f"Unsupported provider: {self.provider}")
+
+    # ── Provider calls ─────────────────────────────────────────────────────
+    def _anthropic_kwargs(self, prompt: str, max_tokens: int, system: str) -> dict:
+        kwargs = dict(
             model=self.model,
-            max_tokens=512,
+            max_tokens=max_tokens,
             temperature=0,
             messages=[{"role": "user", "content": prompt}]
         )
+        if system:
+            kwargs["system"] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        return kwargs
+
+    def _openai_messages(self, prompt: str, system: str) -> list:
+        messages = [{"role": "system", "content": system}] if system else []
+        return messages + [{"role": "user", "content": prompt}]
+
+    def _call_anthropic(self, prompt: str, max_tokens: int, system: str = None) -> tuple:
+        response = self._get_client().messages.create(
+            **self._anthropic_kwargs(prompt, max_tokens, system)
+        )
+        return response.content[0].text, _anthropic_usage(response.usage)
+
+    def _call_openai(self, prompt: str, max_tokens: int, system: str = None) -> tuple:
+        response = self._get_client().chat.completions.create(
+            model=self.model,
+            temperature=0,
+            max_tokens=max_tokens,
+            messages=self._openai_messages(prompt, system)
+        )
+        return response.choices[0].message.content, _openai_usage(response.usage)
+
+    def _stream_anthropic(self, prompt: str, max_tokens: int, system: str, usage: dict):
+        with self._get_client().messages.stream(
+            **self._anthropic_kwargs(prompt, max_tokens, system)
+        ) as stream:
+            for event in stream:
+                if event.type == "message_start":
+                    usage.update(_anthropic_usage(event.message.usage))
+                elif event.type == "message_delta" and event.usage:
+                    usage["output_tokens"] = event.usage.output_tokens
+                elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                    yield event.delta.text
+
+    def _stream_openai(self, prompt: str, max_tokens: int, system: str, usage: dict):
+        stream = self._get_client().chat.completions.create(
+            model=self.model,
+            temperature=0,
+            max_tokens=max_tokens,
+            messages=self._openai_messages(prompt, system),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        try:
+            for event in stream:
+                if event.usage:
+                    usage.update(_openai_usage(event.usage))
+                if event.choices and event.choices[0].delta.content:
+                    yield event.choices[0].delta.content
+        finally:
+            stream.close()
+
+    async def _acall_anthropic(self, prompt: str, max_tokens: int, system: str = None) -> str:
+        response = await self._get_async_client().messages.create(
+            **self._anthropic_kwargs(prompt, max_tokens, system)
+        )
         return response.content[0].text
 
-    def _call_openai(self, prompt: str) -> str:
-        if "OPENAI_API_KEY" not in os.environ:
-            raise EnvironmentError("OPENAI_API_KEY not set")
-        from openai import OpenAI
-        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-        response = client.chat.completions.create(
+    async def _acall_openai(self, prompt: str, max_tokens: int, system: str = None) -> str:
+        response = await self._get_async_client().chat.completions.create(
             model=self.model,
             temperature=0,
-            max_tokens=512,
-            messages=[{"role": "user", "content": prompt}]
+            max_tokens=max_tokens,
+            messages=self._openai_messages(prompt, system)
         )
         return response.choices[0].message.content
+
+
+def _remaining_s(deadline: float):
+    return None if deadline is None else deadline - time.perf_counter()
+
+
+def _retry_after_s(e: Exception):
+    """Seconds from a retry-after hint on the error (SDK response headers or attribute)."""
+    value = getattr(e, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(e, "response", None), "headers", None)
+        value = headers.get("retry-after") if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _anthropic_usage(usage) -> dict:
+    # Anthropic reports uncached input separately from cache reads/writes
+    return {
+        "input_tokens": usage.input_tokens or 0,
+        "cache_read_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_write_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+        "output_tokens": usage.output_tokens or 0,
+    }
+
+
+def _openai_usage(usage) -> dict:
+    # OpenAI prompt_tokens includes cached tokens
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+    return {
+        "input_tokens": (usage.prompt_tokens or 0) - cached,
+        "cache_read_tokens": cached,
+        "cache_write_tokens": 0,
+        "output_tokens": usage.completion_tokens or 0,
+    }
@@ -2,8 +2,11 @@
 src/metrics_logger.py
 Persists evaluation run metrics to logs/eval_runs/.
 Enables prompt version comparison over time.
+Each run gets a run_id; per-case results, when given, are stored under
+that id by src/result_store.py for case-level diffs between runs.
 """
 
+import uuid
 import jsonlines
 from pathlib import Path
 from datetime import datetime
@@ -11,14 +14,22 @@ import config
 
 LOG_DIR = Path("logs/eval_runs")
 
-def log_run(metrics: dict) -> dict:
+def log_run(metrics: dict, results=None) -> dict:
+    """results: optional per-case DataFrame from Evaluator.run, stored under the run_id."""
     LOG_DIR.mkdir(parents=True, exist_ok=True)
+    now = datetime.utcnow()
     entry = {
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "run_id": f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}",
+        "timestamp": now.isoformat() + "Z",
         "provider": config.LLM_PROVIDER,
         "model": config.LLM_MODEL,
         **metrics
     }
+    if results is not None:
+        from src import result_store
+        meta = {k: entry.get(k) for k in ("timestamp", "provider", "model", "prompt_version", "dataset")}
+        path = result_store.write_results(entry["run_id"], results, {**meta, "cases": len(results)})
+        entry["results_path"] = str(path)
     with jsonlines.open(LOG_DIR / "eval_log.jsonl", "a") as writer:
         writer.write(entry)
     return entry
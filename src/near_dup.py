@@ -0,0 +1,150 @@
+"""
+src/near_dup.py
+Near-duplicate verdict reuse via MinHash-LSH.
+
+Scam campaigns repost one template with small edits (amounts, emoji,
+handles, links). Posts are normalized (numbers, handles and URLs collapsed,
+leetspeak and emoji stripped as in the rules tier) and shingled into
+character 5-grams. A MinHash signature split into LSH bands finds
+candidate prior posts, and exact shingle Jaccard decides the match.
+
+Safety:
+- among all matches at or above the threshold the MOST severe verdict
+  wins, so a high-severity verdict is never downgraded by a benign twin
+- a benign (allow) verdict is reused only at the stricter benign_threshold
+- only provider verdicts are indexed (no parse errors, rules or reuse chains)
+"""
+
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import numpy as np
+from src.rules import normalize
+from src.schema import AgentOutput, severity_key
+import config
+
+UNINDEXED_VIOLATIONS = {"PARSE_ERROR", "LOAD_SHED", "CASCADE_UNRESOLVED"}
+
+_URLS = re.compile(r"https?://\S+|www\.\S+")
+_HANDLES = re.compile(r"@\w+")
+_NUMBERS = re.compile(r"(?<![a-z])[$€£]?\d[\d,.]*(?:%|k|m|x)?(?![a-z])")
+_NON_WORD = re.compile(r"[^a-z# ]+")
+_SPACES = re.compile(r"\s+")
+SHINGLE = 5
+MAX_BUCKET = 64  # most recent ids kept per LSH bucket; bounds lookup cost for mass reposts
+
+
+def canonical(text: str) -> str:
+    text = _HANDLES.sub(" handle ", _URLS.sub(" url ", text.lower()))
+    text = normalize(_NUMBERS.sub(" # ", text))
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text)).strip()
+
+
+def shingles(text: str) -> frozenset:
+    text = canonical(text)
+    if len(text) <= SHINGLE:
+        return frozenset([zlib.crc32(text.encode())])
+    return frozenset(zlib.crc32(text[i:i + SHINGLE].encode()) for i in range(len(text) - SHINGLE + 1))
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = None, benign_threshold: float = None,
+                 num_perm: int = 64, bands: int = 16, max_entries: int = None, seed: int = 0):
+        self.threshold = threshold or config.NEAR_DUP_THRESHOLD
+        self.benign_threshold = max(self.threshold, benign_threshold or config.NEAR_DUP_BENIGN_THRESHOLD)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries or config.NEAR_DUP_MAX_ENTRIES
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family: (a*x + b) mod 2^64, top 32 bits
+        self._a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+        self._entries = OrderedDict()  # id → (shingles, verdict); FIFO eviction
+        self._buckets = [{} for _ in range(bands)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.lookups = 0
+
+    def _signature(self, grams: frozenset) -> np.ndarray:
+        x = np.fromiter(grams, dtype=np.uint64, count=len(grams))
+        with np.errstate(over="ignore"):
+            hashed = (self._a[:, None] * x[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashed.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def lookup(self, text: str):
+        """Return (verdict, similarity) for the most severe qualifying match, or None."""
+        grams = shingles(text)
+        signature = self._signature(grams)
+        best = None
+        with self._lock:
+            self.lookups += 1
+            for prior, verdict in self._candidates(signature):
+                similarity = len(grams & prior) / len(grams | prior)
+                needed = self.threshold if verdict["label"] == 1 else self.benign_threshold
+                if similarity < needed:
+                    continue
+                if best is None or (severity_key(verdict), similarity) > (severity_key(best[0]), best[1]):
+                    best = (verdict, similarity)
+            if best is not None:
+                self.hits += 1
+        return best
+
+    def _candidates(self, signature: np.ndarray):
+        ids = set()
+        for band, key in self._band_keys(signature):
+            ids.update(self._buckets[band].get(key, ()))
+        # Evicted ids are skipped here and pruned from buckets on the next add
+        return [self._entries[i] for i in ids if i in self._entries]
+
+    def match(self, text: str, prompt_version: str = "near_dup") -> AgentOutput:
+        """Reuse a prior verdict as an AgentOutput, or None."""
+        start = time.perf_counter()
+        found = self.lookup(text)
+        if found is None:
+            return None
+        verdict, similarity = found
+        return AgentOutput(
+            domain="financial_integrity",
+            prompt_version=prompt_version,
+            latency_ms=round((time.perf_counter() - start) * 1000, 3),
+            source="near_dup",
+            **{**verdict, "rationale": f"Near-duplicate (similarity {similarity:.2f}) of a prior verdict: "
+                                       f"{verdict['rationale']}"}
+        )
+
+    def add(self, text: str, output: AgentOutput):
+        if output.source not in ("llm", "cache") or output.violation in UNINDEXED_VIOLATIONS:
+            return
+        verdict = {k: getattr(output, k) for k in
+                   ("label", "category", "violation", "severity", "enforcement", "rationale")}
+        grams = shingles(text)
+        signature = self._signature(grams)
+        with self._lock:
+            # An identical normalized post with an equal or stricter verdict adds nothing
+            if any(prior == grams and severity_key(v) >= severity_key(verdict)
+                   for prior, v in self._candidates(signature)):
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (grams, verdict)
+            for band, key in self._band_keys(signature):
+                bucket = self._buckets[band].setdefault(key, [])
+                bucket[:] = [i for i in bucket[-(MAX_BUCKET - 1):] if i in self._entries]
+                bucket.append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "lookups": self.lookups, "hits": self.hits,
+                    "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0}
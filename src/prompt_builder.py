@@ -7,12 +7,88 @@ Caller is responsible for providing all required placeholders.
 Production hardening:
 - Escapes { } in user-provided strings to prevent str.format() crashes/injection
   when users paste JSON/code/configs containing braces.
+
+Prompt caching:
+- A "<<<DYNAMIC>>>" line in a template splits the static prefix (policy,
+  taxonomy, output schema) from the per-item section. build_parts() returns
+  them separately so the prefix can be sent as a cacheable system block.
+  build() joins them and is byte-identical to the template without the marker.
+
+Compact verdicts:
+- compact=True swaps the template's JSON schema block ({{ ... }}) for a
+  one-field schema listing the allowed violation codes. The Agent derives
+  category, severity and enforcement from the code via the taxonomy.
+  UNCERTAIN_CODE keeps the "suggestive but unclear → escalate_review" path
+  expressible without a full verdict.
+
+Confidence:
+- confidence=True adds a static instruction asking for a "confidence" field
+  in every verdict object. Cascade mode gates escalation on it.
 """
 
+import hashlib
+import re
 from pathlib import Path
 import config
 
 
+DYNAMIC_MARKER = "<<<DYNAMIC>>>\n"
+
+BATCH_ITEM_HEADER = "### ITEM {id}"
+
+BATCH_INSTRUCTIONS = """
+BATCH MODE:
+The content above contains {count} separate items, each introduced by a
+"### ITEM <id>" line. Classify every item independently, as if it were the
+only content provided.
+
+Return ONLY a valid JSON array with exactly one object per item, using the
+same structure as above plus an "id" field copied from the item header:
+
+[
+  {{"id": "<id>", "label": 0 or 1, "category": "...", "violation": "...", "severity": "...", "enforcement": "...", "rationale": "..."}}
+]
+"""
+
+
+COMPACT_MARKER = "COMPACT VERDICT"
+COMPACT_RATIONALE_FIELD = '"rationale": "at most 12 words"'
+UNCERTAIN_CODE = "UNCERTAIN"  # expanded by the Agent to medium / escalate_review
+
+COMPACT_SCHEMA = """{{{{"violation": "<code>"{rationale}}}}}
+
+{marker}: return only the violation code. Category, severity and
+enforcement are derived from it. Allowed codes: {codes},
+"NONE" for clearly benign content, or "{uncertain}" when the content is
+financially suggestive but its intent is unclear (it is escalated for human
+review).
+"""
+
+COMPACT_BATCH_INSTRUCTIONS = """
+BATCH MODE:
+The content above contains {count} separate items, each introduced by a
+"### ITEM <id>" line. Classify every item independently, as if it were the
+only content provided.
+
+Return ONLY a valid JSON array with exactly one object per item:
+
+[
+  {{"id": "<id>", "violation": "<code>"{rationale}}}
+]
+"""
+
+CONFIDENCE_MARKER = "CONFIDENCE SCORE"
+
+CONFIDENCE_INSTRUCTIONS = """
+{marker}: add a "confidence" field to every verdict object: a number from
+0 to 1 giving how likely your violation code and severity are correct.
+Use values below 0.8 for implicit, coded or ambiguous content.
+"""
+
+# First doubled-brace block in a template: the full output schema
+_SCHEMA_BLOCK = re.compile(r"^\{\{\n.*?^\}\}\n", re.M | re.S)
+
+
 def _escape_braces(value: str) -> str:
     """
     Escape curly braces so Python str.format() treats them as literals.
@@ -24,9 +100,23 @@ def _escape_braces(value: str) -> str:
 
 
 class PromptBuilder:
-    def __init__(self, prompt_version: str = None):
+    def __init__(self, prompt_version: str = None, compact: bool = False,
+                 rationale: bool = False, codes: list = None, confidence: bool = False):
         self.version = prompt_version or config.DEFAULT_PROMPT_VERSION
-        self.template = self._load_template()
+        self.compact = compact
+        self.rationale = rationale
+        self.confidence = confidence
+        raw = self._load_template()
+        if compact:
+            raw = self._compact(raw, codes)
+        if confidence:
+            raw = self._with_confidence(raw)
+        self.prefix_template, marker, self.suffix_template = raw.partition(DYNAMIC_MARKER)
+        if not marker:
+            # No declared split: the whole template is per-item
+            self.prefix_template, self.suffix_template = "", raw
+        self.template = self.prefix_template + self.suffix_template
+        self.template_hash = hashlib.sha256(self.template.encode("utf-8")).hexdigest()[:16]
 
     def _load_template(self) -> str:
         path = Path(config.PROMPT_DIR) / f"{self.version}.txt"
@@ -34,7 +124,34 @@ class PromptBuilder:
             raise FileNotFoundError(f"Prompt not found: {path}")
         return path.read_text()
 
+    def _compact(self, raw: str, codes: list = None) -> str:
+        if codes is None:
+            from src.taxonomy import code_index, load_taxonomy
+            codes = list(code_index(load_taxonomy()))
+        schema = COMPACT_SCHEMA.format(
+            rationale=f", {COMPACT_RATIONALE_FIELD}" if self.rationale else "",
+            marker=COMPACT_MARKER,
+            codes=", ".join(codes),
+            uncertain=UNCERTAIN_CODE
+        )
+        compacted, n = _SCHEMA_BLOCK.subn(lambda _: schema, raw, count=1)
+        if not n:
+            # No schema block to replace: state the compact schema before the per-item part
+            prefix, marker, suffix = raw.partition(DYNAMIC_MARKER)
+            compacted = prefix + schema + "\n" + marker + suffix if marker else schema + "\n" + raw
+        return compacted
+
+    def _with_confidence(self, raw: str) -> str:
+        # Static instruction: goes at the end of the cacheable prefix
+        instructions = CONFIDENCE_INSTRUCTIONS.format(marker=CONFIDENCE_MARKER).lstrip("\n") + "\n"
+        prefix, marker, suffix = raw.partition(DYNAMIC_MARKER)
+        return prefix + instructions + marker + suffix if marker else instructions + raw
+
     def build(self, **kwargs) -> str:
+        return "".join(self.build_parts(**kwargs))
+
+    def build_parts(self, **kwargs) -> tuple:
+        """Return (static_prefix, dynamic_suffix) rendered with the same kwargs."""
         # Defensive copy
         safe_kwargs = dict(kwargs)
 
@@ -45,7 +162,10 @@ class PromptBuilder:
                 safe_kwargs[k] = _escape_braces(v)
 
         try:
-            return self.template.format(**safe_kwargs)
+            return (
+                self.prefix_template.format(**safe_kwargs),
+                self.suffix_template.format(**safe_kwargs),
+            )
         except KeyError as e:
             raise ValueError(
                 f"Missing placeholder in prompt template '{self.version}': {e}"
@@ -55,3 +175,23 @@ class PromptBuilder:
             raise ValueError(
                 f"Failed to render prompt template '{self.version}': {e}"
             ) from e
+
+    def build_batch(self, items: list, **kwargs) -> str:
+        return "".join(self.build_batch_parts(items, **kwargs))
+
+    def build_batch_parts(self, items: list, **kwargs) -> tuple:
+        """
+        Render the template once for several (id, text) items.
+        Items are packed into the {text} slot and batch output instructions
+        are appended, so every template works in batch mode unchanged.
+        """
+        block = "\n\n".join(
+            f"{BATCH_ITEM_HEADER.format(id=item_id)}\n{text}" for item_id, text in items
+        )
+        prefix, suffix = self.build_parts(text=block, **kwargs)
+        if self.compact:
+            rationale = f", {COMPACT_RATIONALE_FIELD}" if self.rationale else ""
+            instructions = COMPACT_BATCH_INSTRUCTIONS.format(count=len(items), rationale=rationale)
+        else:
+            instructions = BATCH_INSTRUCTIONS.format(count=len(items))
+        return prefix, suffix + "\n" + instructions
@@ -0,0 +1,95 @@
+"""
+src/registry.py
+Process-wide registry of warm Agents.
+
+One Agent per (prompt version, provider, model), built once with its
+template loaded and the parsed taxonomy, and reused across requests. One
+LLMClient per (provider, model) is shared by every Agent on it, so the
+HTTP connection pool survives template reloads. A client is rebuilt only
+when its API key environment variable changes.
+
+Hot reload: each get() stats the template and policy/reason_codes.json.
+When the mtime or size moves, the file is re-hashed, and the Agent is
+rebuilt only if the content hash actually changed.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from src.agent import Agent
+from src.llm_client import LLMClient
+from src.taxonomy import load_taxonomy
+import config
+
+API_KEY_ENV = {"anthropic": "ANTHROPIC_API_KEY", "openai": "OPENAI_API_KEY"}
+
+
+class AgentRegistry:
+    def __init__(self, use_rules: bool = False, **agent_kwargs):
+        """agent_kwargs are passed to every Agent (e.g. cache, limiter, compact)."""
+        self.use_rules = use_rules
+        self.agent_kwargs = agent_kwargs
+        self.reloads = 0
+        self._agents = {}    # (version, provider, model) → (Agent, fingerprint)
+        self._clients = {}   # (provider, model) → (LLMClient, api key)
+        self._files = {}     # path → (mtime_ns, size, sha256)
+        self._taxonomy = (None, None)  # (sha256, parsed)
+        self._lock = threading.Lock()
+
+    def get(self, prompt_version: str = None, provider: str = None, model: str = None) -> Agent:
+        version = prompt_version or config.DEFAULT_PROMPT_VERSION
+        provider = provider or config.LLM_PROVIDER
+        model = model or config.LLM_MODEL
+        key = (version, provider, model)
+        with self._lock:
+            fingerprint = (
+                self._file_hash(Path(config.PROMPT_DIR) / f"{version}.txt"),
+                self._file_hash(Path(config.REASON_CODES_PATH)),
+            )
+            entry = self._agents.get(key)
+            client = self._client(provider, model)
+            if entry is None or entry[1] != fingerprint or entry[0].llm is not client:
+                if entry is not None:
+                    self.reloads += 1
+                taxonomy = self._load_taxonomy()
+                rules = None
+                if self.use_rules:
+                    from src.rules import RulesFilter
+                    rules = RulesFilter(taxonomy)
+                agent = Agent(version, llm=client, rules=rules, taxonomy=taxonomy, **self.agent_kwargs)
+                self._agents[key] = entry = (agent, fingerprint)
+            return entry[0]
+
+    @property
+    def taxonomy(self) -> dict:
+        """Parsed reason_codes.json, re-read only when its content changes."""
+        with self._lock:
+            return self._load_taxonomy()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"agents": len(self._agents), "clients": len(self._clients), "reloads": self.reloads}
+
+    def _load_taxonomy(self) -> dict:
+        digest = self._file_hash(Path(config.REASON_CODES_PATH))
+        if self._taxonomy[0] != digest:
+            self._taxonomy = (digest, load_taxonomy())
+        return self._taxonomy[1]
+
+    def _client(self, provider: str, model: str) -> LLMClient:
+        api_key = os.environ.get(API_KEY_ENV.get(provider, ""), "")
+        cached = self._clients.get((provider, model))
+        if cached is None or cached[1] != api_key:
+            cached = self._clients[(provider, model)] = (LLMClient(provider, model), api_key)
+        return cached[0]
+
+    def _file_hash(self, path: Path) -> str:
+        stat = path.stat()
+        cached = self._files.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        self._files[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
@@ -0,0 +1,120 @@
+"""
+src/response_cache.py
+On-disk (SQLite) cache of raw LLM responses.
+Inference is deterministic (temperature=0), so a response is keyed by
+provider, model, prompt template hash and the rendered prompt.
+
+Eviction is LRU by last access, bounded by entry count, total bytes and
+age. Hit/miss counters are kept per cache instance.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+import config
+
+
+class ResponseCache:
+    def __init__(self, path: str = None, max_entries: int = None, max_bytes: int = None,
+                 max_age_days: float = None, bypass: bool = None):
+        self.path = Path(path or config.CACHE_PATH)
+        self.max_entries = max_entries or config.CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or config.CACHE_MAX_BYTES
+        self.max_age_s = (max_age_days or config.CACHE_MAX_AGE_DAYS) * 86400
+        self.bypass = config.CACHE_BYPASS if bypass is None else bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, text TEXT NOT NULL, latency_ms REAL NOT NULL,"
+            " size INTEGER NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(provider: str, model: str, template_hash: str, prompt: str) -> str:
+        h = hashlib.sha256()
+        for part in (provider, model, template_hash, prompt):
+            h.update(part.encode("utf-8"))
+            h.update(b"\x00")
+        return h.hexdigest()
+
+    def get(self, key: str):
+        """Return (text, latency_ms) or None. Counts as a miss when bypassed."""
+        if self.bypass:
+            self.misses += 1
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, latency_ms, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.max_age_s:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return row[0], row[1]
+
+    def put(self, key: str, text: str, latency_ms: float):
+        if self.bypass:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, text, latency_ms, len(text.encode("utf-8")), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_s,))
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Drop least recently used rows until both bounds hold
+        excess_rows = max(0, count - self.max_entries)
+        excess_bytes = max(0, total - self.max_bytes)
+        dropped_rows, dropped_bytes, doomed = 0, 0, []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if dropped_rows >= excess_rows and dropped_bytes >= excess_bytes:
+                break
+            doomed.append((key,))
+            dropped_rows += 1
+            dropped_bytes += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "entries": count,
+            "bytes": total,
+            "bypass": self.bypass,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,174 @@
+"""
+src/result_store.py
+Columnar per-case result store and run-to-run regression diff.
+
+Every logged run's per-case DataFrame (predictions, rationales, latencies,
+stage timings) is written as an uncompressed Arrow IPC file, partitioned by
+run id:
+
+    logs/eval_runs/results/run_id=<run_id>/cases.arrow
+
+Reads go through a memory map, so loading a run costs no copy and diffing
+two million-case runs touches only the columns the diff needs.
+
+Usage:
+    python -m src.result_store list
+    python -m src.result_store diff <run_a> <run_b> [--limit 20] [--out flips.csv]
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+from src.metrics_logger import LOG_DIR
+
+RESULTS_DIR = LOG_DIR / "results"
+DIFF_FIELDS = ["pred_label", "pred_severity", "pred_enforcement"]
+DIFF_COLUMNS = ["id", "true_label", "true_severity", "pred_violation", *DIFF_FIELDS, "latency_ms"]
+
+
+def run_path(run_id: str):
+    return RESULTS_DIR / f"run_id={run_id}" / "cases.arrow"
+
+
+def write_results(run_id: str, results: pd.DataFrame, meta: dict = None):
+    """Write a run's per-case results atomically. meta is stored in the schema metadata."""
+    path = run_path(run_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(results, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"run_meta": json.dumps({"run_id": run_id, **(meta or {})}).encode()
+    })
+    tmp = path.with_suffix(".arrow.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+def read_results(run_id: str, columns: list = None) -> pa.Table:
+    """Memory-mapped, zero-copy read of a run's results (optionally a column subset)."""
+    path = run_path(run_id)
+    if not path.exists():
+        raise FileNotFoundError(f"No per-case results for run {run_id} ({path})")
+    table = ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    if columns:
+        table = table.select([c for c in columns if c in table.column_names])
+    return table
+
+
+def run_meta(run_id: str) -> dict:
+    with pa.memory_map(str(run_path(run_id)), "r") as source:
+        metadata = ipc.open_file(source).schema.metadata or {}
+    return json.loads(metadata.get(b"run_meta", b"{}"))
+
+
+def list_runs() -> list:
+    if not RESULTS_DIR.exists():
+        return []
+    runs = [run_meta(p.name.split("=", 1)[1]) for p in RESULTS_DIR.glob("run_id=*") if (p / "cases.arrow").exists()]
+    return sorted(runs, key=lambda m: m.get("timestamp", ""))
+
+
+def diff_runs(run_a: str, run_b: str) -> dict:
+    """
+    Join two runs on case id. Returns flip counts per field, enforcement
+    transitions (e.g. "remove→allow"), latency deltas (b - a) over matched
+    cases, and a DataFrame of the flipped cases only.
+    """
+    a = read_results(run_a, DIFF_COLUMNS)
+    b = read_results(run_b, DIFF_COLUMNS)
+    joined = _align(a, b)
+
+    flipped = {}
+    any_flip = pa.array(np.zeros(joined.num_rows, dtype=bool))
+    for field in DIFF_FIELDS:
+        left, right = joined[f"{field}_a"], joined[f"{field}_b"]
+        # Null on exactly one side counts as a flip
+        changed = pc.fill_null(pc.not_equal(left, right), False)
+        changed = pc.or_(changed, pc.xor(pc.is_null(left), pc.is_null(right)))
+        flipped[field] = changed
+        any_flip = pc.or_(any_flip, changed)
+
+    flips = joined.filter(any_flip).to_pandas()
+    flips["latency_delta_ms"] = flips["latency_ms_b"] - flips["latency_ms_a"]
+    transitions = (
+        flips.loc[flips.pred_enforcement_a != flips.pred_enforcement_b]
+             .groupby(["pred_enforcement_a", "pred_enforcement_b"]).size()
+    )
+
+    delta = (pc.subtract(joined["latency_ms_b"], joined["latency_ms_a"])
+               .to_numpy(zero_copy_only=False).astype(float))
+    delta = delta[~np.isnan(delta)]
+    p50, p95 = np.quantile(delta, [0.50, 0.95]) if len(delta) else (np.nan, np.nan)
+
+    return {
+        "run_a": run_a,
+        "run_b": run_b,
+        "cases_a": a.num_rows,
+        "cases_b": b.num_rows,
+        "matched": joined.num_rows,
+        "label_flips": int(pc.sum(flipped["pred_label"]).as_py() or 0),
+        "severity_flips": int(pc.sum(flipped["pred_severity"]).as_py() or 0),
+        "enforcement_flips": int(pc.sum(flipped["pred_enforcement"]).as_py() or 0),
+        "enforcement_transitions": {f"{x}→{y}": int(n) for (x, y), n in transitions.items()},
+        "latency_delta_ms": {
+            "mean": round(float(delta.mean()), 1) if len(delta) else None,
+            "p50": round(float(p50), 1),
+            "p95": round(float(p95), 1),
+        },
+        "flips": flips,
+    }
+
+
+def _align(a: pa.Table, b: pa.Table) -> pa.Table:
+    """Inner join on id. Runs over the same dataset are usually already row-aligned."""
+    if a.num_rows == b.num_rows and pc.all(pc.equal(a["id"], b["id"])).as_py():
+        b_rows = b
+    else:
+        positions = pc.index_in(a["id"], value_set=b["id"])
+        matched = pc.is_valid(positions)
+        a = a.filter(matched)
+        b_rows = b.take(positions.filter(matched))
+    columns = {"id": a["id"], "true_label": a["true_label"], "true_severity": a["true_severity"]}
+    for name in DIFF_COLUMNS[3:]:
+        columns[f"{name}_a"] = a[name]
+        columns[f"{name}_b"] = b_rows[name]
+    return pa.table(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and diff per-case run results.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="list runs with stored per-case results")
+    diff = sub.add_parser("diff", help="compare two runs case by case")
+    diff.add_argument("run_a")
+    diff.add_argument("run_b")
+    diff.add_argument("--limit", type=int, default=20, help="flipped cases to print")
+    diff.add_argument("--out", help="write all flipped cases to this CSV")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for m in list_runs():
+            print(f"{m['run_id']}  {m.get('timestamp', '')}  {m.get('prompt_version')} × {m.get('dataset')}  "
+                  f"({m.get('cases', '?')} cases)")
+        return
+
+    result = diff_runs(args.run_a, args.run_b)
+    flips = result.pop("flips")
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.out:
+        flips.to_csv(args.out, index=False)
+        print(f"Wrote {len(flips)} flipped cases to {args.out}")
+    elif len(flips):
+        cols = ["id", "true_label", *[f"{f}_{s}" for f in DIFF_FIELDS for s in "ab"], "latency_delta_ms"]
+        print(flips[cols].head(args.limit).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+src/rules.py
+Deterministic rules pre-filter tier, compiled from policy/reason_codes.json.
+
+All violation rule_patterns, benign context patterns and domain terms are
+compiled into ONE alternation regex with a named group per violation code,
+so a post is scanned in a single pass (microseconds per post).
+
+Cascade decision:
+- violation pattern hit, no benign context → rule verdict (most severe code wins)
+- anything else                           → None (send to the LLM)
+
+With allow_benign (RULES_ALLOW_BENIGN, off by default) a post with no
+violation hit, no domain term and no money/contact cue (digits, currency,
+links, handles) is allowed without an LLM call. A term list cannot vouch
+for a post, so this is an opt-in trade of recall for cost.
+"""
+
+import re
+import time
+import config
+from src.schema import AgentOutput
+from src.taxonomy import code_index, load_taxonomy
+
+# Leetspeak / obfuscation normalization ("Guarant33d r3turns", "fr33", "1nvest").
+# Only runs touching a letter are mapped, and never inside an amount ("5k",
+# "100x", "0.5"), so numbers and sentence punctuation ("cash!") keep their meaning.
+_LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+                       "@": "a", "!": "i", "€": "e"})
+_LEET_RUN = re.compile(r"(?<=[a-z])[013457@!€]+|[013457@!€]+(?=[a-z])")
+_WORD = re.compile(r"[a-z0-9@!€]+")
+_AMOUNT = re.compile(r"\d+(?:k|m|bn|x)?")
+_TRAILING_PUNCT = re.compile(r"[!?.,:;]+(?=\s|$)")  # before leet mapping turns "!!" into "ii"
+_SPACED_LETTERS = re.compile(r"\b(\w)-(?=\w\b)")   # "g-u-a-r-a-n-t-e-e-d"
+_NON_ASCII = re.compile(r"[^\x00-\x7f]+")           # emoji inserted mid-word
+# Money / contact cues on the raw text that keep a post off the benign allow
+# path even with no domain term: any digit ("5k", "100x", phone numbers),
+# currency symbols, links and handles
+_RISK_CUES = re.compile(r"\d|[$€£¥₿]|https?://|www\.|@\w")
+
+
+def normalize(text: str) -> str:
+    text = _NON_ASCII.sub("", text.lower())
+    if "-" in text:
+        text = _SPACED_LETTERS.sub(r"\1", text)
+    text = _TRAILING_PUNCT.sub(" ", text)
+    return _WORD.sub(_unleet, text)
+
+
+def _unleet(m: re.Match) -> str:
+    word = m.group()
+    if _AMOUNT.fullmatch(word):
+        return word
+    return _LEET_RUN.sub(lambda run: run.group().translate(_LEET), word)
+
+
+def _to_regex(pattern: str) -> str:
+    if pattern.endswith("*"):
+        return re.escape(normalize(pattern[:-1]).strip()) + r"\w*"
+    return re.escape(normalize(pattern).strip()) + r"\b"
+
+
+class RulesFilter:
+    def __init__(self, taxonomy: dict = None, allow_benign: bool = None):
+        taxonomy = taxonomy or load_taxonomy()
+        self.codes = code_index(taxonomy)
+        self.allow_benign = config.RULES_ALLOW_BENIGN if allow_benign is None else allow_benign
+        prefilter = taxonomy.get("rule_prefilter", {})
+
+        groups = []
+        for i, (code, v) in enumerate(self.codes.items()):
+            if v.get("rule_patterns"):
+                groups.append((f"v{i}", code, v["rule_patterns"]))
+        groups.append(("ctx", None, prefilter.get("benign_context_patterns", [])))
+        groups.append(("domain", None, prefilter.get("domain_terms", [])))
+
+        self._group_code = {name: code for name, code, _ in groups}
+        # Longest alternatives first so "dm me" wins over "dm*" at the same offset
+        self._regex = re.compile("|".join(
+            f"(?P<{name}>\\b(?:{'|'.join(_to_regex(p) for p in sorted(pats, key=len, reverse=True))}))"
+            for name, _, pats in groups if pats
+        ))
+
+    def scan(self, text: str) -> dict:
+        """Return {"codes": [...], "context": bool, "domain": bool, "matches": {code: str}}."""
+        norm = normalize(text)
+        codes, matches, context = [], {}, False
+        domain = bool(_RISK_CUES.search(text))
+        for m in self._regex.finditer(norm):
+            group = m.lastgroup
+            if group == "ctx":
+                context = True
+            elif group == "domain":
+                domain = True
+            else:
+                code = self._group_code[group]
+                codes.append(code)
+                matches.setdefault(code, m.group())
+        return {"codes": codes, "context": context, "domain": domain or bool(codes), "matches": matches}
+
+    def match(self, text: str, prompt_version: str = "rules") -> AgentOutput:
+        """Return a rule-tagged AgentOutput when confident, else None."""
+        start = time.perf_counter()
+        hit = self.scan(text)
+        if hit["codes"] and not hit["context"]:
+            code = max(hit["codes"], key=lambda c: self.codes[c]["risk_weight"])
+            v = self.codes[code]
+            data = {
+                "label": 1, "category": v["category"], "violation": code,
+                "severity": v["severity"], "enforcement": v["enforcement"],
+                "rationale": f"Rule match on '{hit['matches'][code]}' ({code}).",
+            }
+        elif self.allow_benign and not hit["domain"] and not hit["context"]:
+            data = {
+                "label": 0, "category": "none", "violation": "NONE",
+                "severity": "low", "enforcement": "allow",
+                "rationale": "No financial-domain terms or money/contact cues detected by rules tier.",
+            }
+        else:
+            return None
+        return AgentOutput(
+            domain="financial_integrity",
+            prompt_version=prompt_version,
+            latency_ms=round((time.perf_counter() - start) * 1000, 3),
+            source="rules",
+            **data
+        )
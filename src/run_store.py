@@ -0,0 +1,127 @@
+"""
+src/run_store.py
+Indexed run-history store over the append-only eval log.
+
+The JSONL log (logs/eval_runs/eval_log.jsonl) stays the audit source of
+truth. RunHistoryStore mirrors it into SQLite, reading only the bytes
+appended since the last sync (tracked by file offset), and maintains a
+latest-run-per-(dataset, prompt_version) table on insert. Dashboard
+queries therefore cost the same no matter how much history exists.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from src import metrics_logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    byte_offset INTEGER UNIQUE NOT NULL,
+    timestamp TEXT, dataset TEXT, prompt_version TEXT, provider TEXT, model TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup ON runs(dataset, prompt_version, timestamp);
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs(timestamp);
+CREATE TABLE IF NOT EXISTS latest (
+    dataset TEXT, prompt_version TEXT, run_id INTEGER, timestamp TEXT,
+    PRIMARY KEY (dataset, prompt_version)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class RunHistoryStore:
+    def __init__(self, log_path: str = None, db_path: str = None):
+        self.log_path = Path(log_path or metrics_logger.LOG_DIR / "eval_log.jsonl")
+        self.db_path = Path(db_path or self.log_path.with_name("run_history.sqlite"))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # ── Incremental ingest ─────────────────────────────────────────────────
+    @property
+    def offset(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'offset'").fetchone()
+        return int(row[0]) if row else 0
+
+    def sync(self) -> int:
+        """Ingest lines appended since the last sync. Returns the new file offset."""
+        with self._lock:
+            offset = self.offset
+            if not self.log_path.exists():
+                return offset
+            size = self.log_path.stat().st_size
+            if size < offset:
+                # Log was truncated or replaced — rebuild from scratch
+                self._conn.executescript("DELETE FROM runs; DELETE FROM latest;")
+                offset = 0
+            if size == offset:
+                return offset
+            with open(self.log_path, "rb") as f:
+                f.seek(offset)
+                data = f.read(size - offset)
+            # Only consume complete lines; a partially written tail waits for the next sync
+            end = data.rfind(b"\n") + 1
+            pos = offset
+            for raw in data[:end].splitlines(keepends=True):
+                line = raw.strip()
+                if line:
+                    try:
+                        self._insert(pos, json.loads(line))
+                    except json.JSONDecodeError:
+                        pass
+                pos += len(raw)
+            offset += end
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('offset', ?)", (str(offset),))
+            self._conn.commit()
+            return offset
+
+    def _insert(self, byte_offset: int, entry: dict):
+        cur = self._conn.execute(
+            "INSERT OR IGNORE INTO runs (byte_offset, timestamp, dataset, prompt_version, provider, model, entry) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (byte_offset, entry.get("timestamp"), entry.get("dataset"), entry.get("prompt_version"),
+             entry.get("provider"), entry.get("model"), json.dumps(entry))
+        )
+        if cur.rowcount:
+            self._conn.execute(
+                "INSERT INTO latest VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(dataset, prompt_version) DO UPDATE SET "
+                "run_id = excluded.run_id, timestamp = excluded.timestamp "
+                "WHERE excluded.timestamp >= latest.timestamp",
+                (entry.get("dataset"), entry.get("prompt_version"), cur.lastrowid, entry.get("timestamp"))
+            )
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+    def latest(self, dataset: str) -> list:
+        """Most recent run entry per prompt version for a dataset."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.entry FROM latest l JOIN runs r ON r.id = l.run_id "
+                "WHERE l.dataset = ? ORDER BY l.prompt_version", (dataset,)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def history(self, dataset: str = None, prompt_version: str = None, limit: int = 500) -> list:
+        """Run entries, newest first, optionally filtered (served by the lookup index)."""
+        clauses, params = [], []
+        if dataset is not None:
+            clauses.append("dataset = ?")
+            params.append(dataset)
+        if prompt_version is not None:
+            clauses.append("prompt_version = ?")
+            params.append(prompt_version)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT entry FROM runs {where} ORDER BY timestamp DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
@@ -0,0 +1,61 @@
+"""
+src/running_metrics.py
+Incremental evaluation metrics.
+Updated one result row at a time, in O(1) memory, so confusion counts,
+recall, high-severity recall and latency quantiles can be read mid-run.
+"""
+
+import threading
+from src.sketch import QuantileSketch
+
+
+class RunningMetrics:
+    def __init__(self):
+        self.n = 0
+        self.tp = self.fp = self.fn = self.tn = 0
+        self.high_total = 0
+        self.high_caught = 0
+        self.high_fn = 0
+        self.parse_errors = 0
+        self.latency = QuantileSketch()
+        self._lock = threading.Lock()
+
+    def update(self, row: dict):
+        true_label, pred_label = row["true_label"], row["pred_label"]
+        with self._lock:
+            self.n += 1
+            if true_label == 1 and pred_label == 1:
+                self.tp += 1
+            elif true_label == 0 and pred_label == 1:
+                self.fp += 1
+            elif true_label == 1 and pred_label == 0:
+                self.fn += 1
+            elif true_label == 0 and pred_label == 0:
+                self.tn += 1
+            if row["true_severity"] == "high":
+                self.high_total += 1
+                self.high_caught += int(pred_label == 1)
+                self.high_fn += int(true_label == 1 and pred_label == 0)
+            self.parse_errors += int(row["pred_violation"] == "PARSE_ERROR")
+            self.latency.add(row["latency_ms"])
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            tp, fp, fn, tn = self.tp, self.fp, self.fn, self.tn
+            precision = tp / (tp + fp) if (tp + fp) > 0 else 0
+            recall    = tp / (tp + fn) if (tp + fn) > 0 else 0
+            f1        = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
+            high_recall = self.high_caught / self.high_total if self.high_total else 0
+            return {
+                "cases_scored": self.n,
+                "precision": round(precision, 4),
+                "recall": round(recall, 4),
+                "f1": round(f1, 4),
+                "high_severity_recall": round(high_recall, 4),
+                "high_severity_fn_count": self.high_fn,
+                "parse_error_count": self.parse_errors,
+                "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+                "p50_latency_ms": round(self.latency.quantile(0.50), 1),
+                "p95_latency_ms": round(self.latency.quantile(0.95), 1),
+                "p99_latency_ms": round(self.latency.quantile(0.99), 1),
+            }
@@ -8,6 +8,17 @@ all prompt versions and evaluation runs.
 from dataclasses import dataclass, asdict
 import json
 
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2}
+ENFORCEMENT_RANK = {"allow": 0, "escalate_review": 1, "remove": 2}
+
+
+def severity_key(verdict: dict) -> tuple:
+    """Orders verdicts from least to most severe (label, severity, enforcement)."""
+    label = verdict["label"]
+    # A label that is not 0/1 ranks as a violation instead of breaking comparisons
+    return (int(label) if label in (0, 1) else 1, SEVERITY_RANK.get(verdict["severity"], 1),
+            ENFORCEMENT_RANK.get(verdict["enforcement"], 1))
+
 @dataclass
 class AgentOutput:
     label: int              # 0 = benign, 1 = violation
@@ -19,6 +30,13 @@ class AgentOutput:
     rationale: str          # concise explanation
     prompt_version: str     # e.g. "v2_hierarchical"
     latency_ms: float       # measured per call
+    source: str = "llm"     # "llm" | "cache" (cached: latency is the original measurement)
+    ttft_ms: float = None   # streaming only: time to first token
+    verdict_ms: float = None  # streaming only: time until the JSON verdict closed
+    usage: dict = None      # provider tokens: input (uncached), cache_read, cache_write, output
+    trace: dict = None      # per-stage timing spans + retry count (src/tracing.py)
+    confidence: float = None  # model's self-reported confidence (cascade mode)
+    cascade: dict = None    # cascade mode: escalated, reason, per-tier model/latency/verdict/usage
 
     def to_dict(self) -> dict:
         return asdict(self)
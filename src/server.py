@@ -0,0 +1,288 @@
+"""
+src/server.py
+Long-running HTTP classification service around Agent.classify.
+
+One warm Agent (and its provider client) serves every request. Admission
+control keeps the service responsive under overload:
+  - at most max_concurrency classifications run at once, and at most
+    max_queue more wait for a slot; anything beyond is shed immediately
+  - deadline-aware shedding: a request whose remaining deadline is shorter
+    than the observed p50 service time is shed instead of queued, and the
+    remaining deadline is passed down to the provider call
+  - identical texts in flight at the same time share one classification
+    (singleflight)
+A shed request gets the policy-safe escalate_review verdict right away,
+never a silent allow. Every classified verdict also feeds an optional
+DriftMonitor, whose state is saved for the dashboard as panes close.
+
+Endpoints:
+    POST /classify   {"text": "...", "deadline_ms": 2000}  → AgentOutput JSON
+    GET  /metrics    queue depth, shed rate, dedup hits, latency histograms
+    GET  /drift      online drift report (current vs reference window, alerts)
+    GET  /healthz
+
+Usage:
+    python -m src.server --port 8080 --workers 8 --max-queue 64
+    LLM_PROVIDER=local python -m src.server     # offline, simulated provider
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.agent import Agent
+from src.drift_monitor import DriftMonitor
+from src.llm_client import DeadlineExceeded
+from src.schema import AgentOutput
+from src.sketch import QuantileSketch
+import config
+
+SHED_VERDICT = {
+    "label": 1,
+    "category": "none",
+    "violation": "LOAD_SHED",
+    "severity": "medium",
+    "enforcement": "escalate_review",
+    "rationale": "Service overloaded — escalated for review without classification."
+}
+
+# Fixed histogram bucket bounds (ms), Prometheus-style cumulative counts
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class LatencyHistogram:
+    """Fixed-bucket counts plus a quantile sketch. Not thread-safe on its own."""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.sketch = QuantileSketch()
+
+    def add(self, latency_ms: float):
+        i = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= bound),
+                 len(LATENCY_BUCKETS_MS))
+        self.bucket_counts[i] += 1
+        self.sketch.add(latency_ms)
+
+    def to_dict(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip([*map(str, LATENCY_BUCKETS_MS), "+Inf"], self.bucket_counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        has_data = self.sketch.count > 0
+        return {
+            "count": self.sketch.count,
+            "buckets_le_ms": buckets,
+            "p50_ms": round(self.sketch.quantile(0.50), 1) if has_data else None,
+            "p95_ms": round(self.sketch.quantile(0.95), 1) if has_data else None,
+            "p99_ms": round(self.sketch.quantile(0.99), 1) if has_data else None,
+        }
+
+
+class ClassificationService:
+    def __init__(self, agent: Agent = None, max_concurrency: int = None,
+                 max_queue: int = None, deadline_ms: float = None, monitor: DriftMonitor = None):
+        self.agent = agent or Agent()
+        self.monitor = monitor
+        self.max_concurrency = max_concurrency or config.SERVICE_MAX_CONCURRENCY
+        self.max_queue = config.SERVICE_MAX_QUEUE if max_queue is None else max_queue
+        self.deadline_ms = deadline_ms or config.SERVICE_DEADLINE_MS
+        self._slots = threading.Semaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._inflight = {}  # text → Future shared by concurrent identical requests
+        self._waiting = 0
+        self._active = 0
+        self.counters = {"requests": 0, "completed": 0, "shed": 0, "dedup_hits": 0, "errors": 0}
+        self.latency = LatencyHistogram()          # end-to-end, as seen by clients
+        self.service_latency = LatencyHistogram()  # agent.classify only; drives shedding
+
+    def classify(self, text: str, deadline_ms: float = None) -> AgentOutput:
+        start = time.perf_counter()
+        deadline = start + (deadline_ms or self.deadline_ms) / 1000
+        with self._lock:
+            self.counters["requests"] += 1
+            leader = text not in self._inflight
+            full = self._waiting + self._active >= self.max_concurrency + self.max_queue
+            if not leader:
+                future = self._inflight[text]
+                self.counters["dedup_hits"] += 1
+            elif not full:
+                future = self._inflight[text] = Future()
+                self._waiting += 1
+        if leader and full:
+            return self._finish(self._shed(start, "queue full"), start)
+
+        if not leader:
+            try:
+                output = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+            except FutureTimeout:
+                output = self._shed(start, "deadline")
+            return self._finish(output, start)
+
+        try:
+            output = self._run(text, deadline)
+        except Exception as e:
+            future.set_exception(e)
+            with self._lock:
+                self.counters["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[text]
+        if output is None:
+            output = self._shed(start, "deadline")
+        elif self.monitor is not None:
+            self.monitor.observe(output, text)  # once per classification, not per deduplicated request
+        future.set_result(output)
+        return self._finish(output, start)
+
+    def _run(self, text: str, deadline: float):
+        """Wait for a slot and classify, or return None when the deadline can't be met."""
+        with self._lock:
+            expected_s = self.service_latency.sketch.quantile(0.50) / 1000 if self.service_latency.sketch.count else 0.0
+        budget_s = deadline - time.perf_counter() - expected_s
+        acquired = budget_s > 0 and self._slots.acquire(timeout=budget_s)
+        with self._lock:
+            self._waiting -= 1
+            if acquired:
+                self._active += 1
+        if not acquired:
+            return None
+        try:
+            service_start = time.perf_counter()
+            try:
+                output = self.agent.classify(text, deadline_ms=(deadline - service_start) * 1000)
+            except DeadlineExceeded:
+                return None
+            with self._lock:
+                self.service_latency.add((time.perf_counter() - service_start) * 1000)
+            return output
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._slots.release()
+
+    def _finish(self, output: AgentOutput, start: float) -> AgentOutput:
+        with self._lock:
+            self.counters["shed" if output.source == "shed" else "completed"] += 1
+            self.latency.add((time.perf_counter() - start) * 1000)
+        return output
+
+    def _shed(self, start: float, reason: str) -> AgentOutput:
+        return AgentOutput(
+            **{**SHED_VERDICT, "rationale": f"{SHED_VERDICT['rationale']} ({reason})"},
+            domain="financial_integrity",
+            prompt_version=self.agent.prompt_version,
+            latency_ms=round((time.perf_counter() - start) * 1000, 1),
+            source="shed"
+        )
+
+    def metrics(self) -> dict:
+        with self._lock:
+            requests = self.counters["requests"]
+            return {
+                **self.counters,
+                "queue_depth": self._waiting,
+                "active": self._active,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "shed_rate": round(self.counters["shed"] / requests, 4) if requests else 0.0,
+                "latency": self.latency.to_dict(),
+                "service_latency": self.service_latency.to_dict(),
+                "llm_calls": self.agent.stats["llm_calls"],
+                "llm": dict(self.agent.llm.stats),
+            }
+
+
+def make_handler(service: ClassificationService):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, service.metrics())
+            elif self.path == "/drift" and service.monitor is not None:
+                self._send(200, service.monitor.report())
+            elif self.path == "/healthz":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/classify":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                text = body["text"]
+                deadline_ms = body.get("deadline_ms")
+                if deadline_ms is not None and not _positive_number(deadline_ms):
+                    raise ValueError("deadline_ms must be a positive number")
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self._send(400, {"error": 'expected JSON body {"text": "...", "deadline_ms": optional}'})
+                return
+            try:
+                output = service.classify(text, deadline_ms)
+            except Exception as e:
+                self._send(502, {"error": str(e)})
+                return
+            self._send(200, output.to_dict())
+
+        def _send(self, status: int, payload: dict):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # per-request access logs would dominate under load; see /metrics
+
+    return Handler
+
+
+def _positive_number(value) -> bool:
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and value > 0)
+
+
+class ClassificationHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # accept bursts; admission control happens in the service
+
+
+def serve(service: ClassificationService, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    """Create the server (call serve_forever() on it, or run it in a thread for tests)."""
+    return ClassificationHTTPServer((host, port), make_handler(service))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the classification HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--prompt-version", default=None)
+    parser.add_argument("--workers", type=int, default=None, help="max concurrent classifications")
+    parser.add_argument("--max-queue", type=int, default=None, help="max requests waiting for a worker")
+    parser.add_argument("--deadline-ms", type=float, default=None, help="default per-request deadline")
+    parser.add_argument("--drift-state", default=config.DRIFT_STATE_PATH, help="where drift monitor state is saved")
+    args = parser.parse_args()
+
+    monitor = DriftMonitor(state_path=args.drift_state, on_alert=lambda a: print(
+        f"🚨 drift: {a['metric']} = {a['value']} (> {a['threshold']})", flush=True))
+    service = ClassificationService(Agent(args.prompt_version), args.workers, args.max_queue,
+                                    args.deadline_ms, monitor)
+    server = serve(service, args.host, args.port)
+    print(f"🛡️ Serving {service.agent.prompt_version} on http://{args.host}:{args.port} "
+          f"(workers={service.max_concurrency}, queue={service.max_queue}, deadline={service.deadline_ms:.0f}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        monitor.save()
+
+
+if __name__ == "__main__":
+    main()
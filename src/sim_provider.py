@@ -0,0 +1,141 @@
+"""
+src/sim_provider.py
+Local simulated LLM provider (LLM_PROVIDER=local) for offline load tests.
+
+Verdicts are deterministic: replayed from a recorded response file when
+one is configured, otherwise derived from the labels in the gold and drift
+datasets (unknown text → benign). Latency, 429/529 errors and malformed
+JSON are injected from configurable distributions so Agent / Evaluator
+throughput and resilience can be measured without API credit. Compact-mode
+prompts get compact ({"violation": ...}) answers. Prompts asking for a
+confidence score get one derived from a hash of the text (0.55-1.0).
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+import config
+from src.prompt_builder import BATCH_ITEM_HEADER, COMPACT_MARKER, COMPACT_RATIONALE_FIELD, CONFIDENCE_MARKER
+
+_ITEM_HEADER = re.compile(
+    "^" + re.escape(BATCH_ITEM_HEADER).replace(re.escape("{id}"), r"(\S+)") + r"\n", re.M
+)
+_VERDICT_FIELDS = ["label", "category", "violation", "severity", "enforcement"]
+
+BENIGN_VERDICT = {
+    "label": 0, "category": "none", "violation": "NONE",
+    "severity": "low", "enforcement": "allow",
+}
+
+
+class SimulatedProviderError(Exception):
+    """Raised for injected provider errors; message mimics the real SDKs."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds, like the retry-after header on a 429
+
+
+class SimulatedProvider:
+    def __init__(self, label_paths: list = None, responses_path: str = None, seed: int = None):
+        self.latency_ms = config.SIM_LATENCY_MS
+        self.latency_sigma = config.SIM_LATENCY_SIGMA
+        self.ms_per_output_token = config.SIM_MS_PER_OUTPUT_TOKEN
+        self.rate_limit_rate = config.SIM_429_RATE
+        self.overload_rate = config.SIM_529_RATE
+        self.malformed_rate = config.SIM_MALFORMED_RATE
+        self._rng = random.Random(config.SIM_SEED if seed is None else seed)
+        self._lock = threading.Lock()
+        self.verdicts = {}
+        for path in label_paths or [config.GOLD_DATA_PATH, config.DRIFT_DATA_PATH]:
+            if Path(path).exists():
+                with open(path) as f:
+                    for line in f:
+                        case = json.loads(line)
+                        self.verdicts[case["text"].strip()] = {k: case[k] for k in _VERDICT_FIELDS}
+        self.recorded = {}
+        responses_path = responses_path or config.SIM_RESPONSES_PATH
+        if responses_path and Path(responses_path).exists():
+            with open(responses_path) as f:
+                for line in f:
+                    row = json.loads(line)
+                    self.recorded[row["text"].strip()] = row["response"]
+
+    # ── Public API ──────────────────────────────────────────────────────────
+    def complete(self, prompt: str, max_tokens: int, system: str = None) -> tuple:
+        """Return (text, usage) after simulated latency; may raise injected errors."""
+        text, usage = self._respond(prompt, max_tokens, system)
+        time.sleep(self._latency_s(usage["output_tokens"]))
+        return text, usage
+
+    def stream(self, prompt: str, max_tokens: int, system: str = None, usage: dict = None):
+        """Yield the response in small chunks, spreading latency across them."""
+        text, call_usage = self._respond(prompt, max_tokens, system)
+        if usage is not None:
+            usage.update(call_usage)
+        chunks = [text[i:i + 16] for i in range(0, len(text), 16)] or [""]
+        total_s = self._latency_s(call_usage["output_tokens"])
+        first_s = total_s - call_usage["output_tokens"] * self.ms_per_output_token / 1000
+        time.sleep(max(0.0, first_s))
+        per_chunk = (total_s - first_s) / len(chunks)
+        for chunk in chunks:
+            yield chunk
+            time.sleep(per_chunk)
+
+    # ── Internals ──────────────────────────────────────────────────────────
+    def _respond(self, prompt: str, max_tokens: int, system: str) -> tuple:
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            raise SimulatedProviderError("Error code: 429 - rate_limit_error (simulated)", retry_after=1.0)
+        if roll < self.rate_limit_rate + self.overload_rate:
+            raise SimulatedProviderError("Error code: 529 - overloaded_error (simulated)")
+
+        full_prompt = (system or "") + prompt
+        compact = COMPACT_MARKER in full_prompt
+        rationale = not compact or COMPACT_RATIONALE_FIELD in full_prompt
+        confidence = CONFIDENCE_MARKER in full_prompt
+        if "BATCH MODE" in prompt:
+            body = prompt.split("Content:\n", 1)[-1].split("\nBATCH MODE", 1)[0]
+            parts = _ITEM_HEADER.split(body)[1:]
+            items = [{"id": parts[i], **self._verdict(parts[i + 1], compact, rationale, confidence)}
+                     for i in range(0, len(parts), 2)]
+            text = json.dumps(items)
+        else:
+            item = prompt.rsplit("Content:\n", 1)[-1]
+            text = self.recorded.get(item.strip()) or json.dumps(self._verdict(item, compact, rationale, confidence))
+
+        if roll > 1 - self.malformed_rate:
+            text = text[: len(text) // 2]  # truncated mid-object
+
+        output_tokens = max(1, len(text) // 4)
+        if output_tokens > max_tokens:
+            text, output_tokens = text[: max_tokens * 4], max_tokens
+        usage = {
+            "input_tokens": len(prompt) // 4,
+            "cache_read_tokens": len(system or "") // 4,
+            "cache_write_tokens": 0,
+            "output_tokens": output_tokens,
+        }
+        return text, usage
+
+    def _verdict(self, item_text: str, compact: bool = False, rationale: bool = True,
+                 confidence: bool = False) -> dict:
+        verdict = self.verdicts.get(item_text.strip(), BENIGN_VERDICT)
+        if compact:
+            verdict = {"violation": verdict["violation"]}
+        if rationale:
+            verdict = {**verdict, "rationale": "Simulated verdict replayed from dataset labels."}
+        if confidence:
+            bucket = zlib.crc32(item_text.strip().encode()) % 1000
+            verdict = {**verdict, "confidence": round(0.55 + 0.45 * bucket / 999, 2)}
+        return verdict
+
+    def _latency_s(self, output_tokens: int) -> float:
+        with self._lock:
+            base = self._rng.lognormvariate(0, self.latency_sigma) if self.latency_sigma else 1.0
+        return (self.latency_ms * base + output_tokens * self.ms_per_output_token) / 1000
@@ -0,0 +1,131 @@
+"""
+src/sweep.py
+Multi-version, multi-dataset evaluation sweep.
+
+Each dataset is read once. All (prompt version, case) jobs are interleaved
+round-robin and run under ONE worker pool and ONE rate limiter sharing one
+LLMClient, so a full sweep is bounded by the provider rate limit rather
+than by running combinations back to back. One metrics_logger.log_run
+entry (plus its per-case results, see src/result_store.py) is written per
+(version, dataset) combination as soon as it finishes.
+
+Usage:
+    python -m src.sweep --workers 16 --rps 20
+    python -m src.sweep --versions v2_hierarchical v3_high_recall --datasets drift
+    python -m src.sweep --cascade      # small model first, uncertain cases on the strong model
+"""
+
+import argparse
+import time
+from itertools import zip_longest
+from pathlib import Path
+import jsonlines
+import pandas as pd
+import config
+from src import metrics_logger
+from src.concurrency import RateLimiter, chunked, ordered_map
+from src.evaluator import Evaluator
+from src.llm_client import LLMClient
+
+DEFAULT_DATASETS = {"gold": config.GOLD_DATA_PATH, "drift": config.DRIFT_DATA_PATH}
+
+
+def available_versions() -> list:
+    return sorted(p.stem for p in Path(config.PROMPT_DIR).glob("*.txt"))
+
+
+def run_sweep(versions: list = None, datasets: dict = None, max_workers: int = 8,
+              rps: float = None, batch_size: int = 1, log: bool = True, **evaluator_kwargs) -> dict:
+    """
+    Run every version against every dataset. Returns
+    {(version, dataset): {"results": DataFrame, "metrics": dict}}.
+    """
+    versions = versions or available_versions()
+    datasets = datasets or DEFAULT_DATASETS
+    cases = {}
+    for name, path in datasets.items():
+        with jsonlines.open(path) as reader:
+            cases[name] = list(reader)
+
+    limiter = RateLimiter(rps)
+    cascade = evaluator_kwargs.get("cascade")
+    if config.CASCADE if cascade is None else cascade:
+        # Both tiers shared across combinations, like the single-model client
+        llm = LLMClient(model=config.CASCADE_SMALL_MODEL)
+        evaluator_kwargs.setdefault("strong_llm", LLMClient(model=config.CASCADE_STRONG_MODEL))
+    else:
+        llm = LLMClient()
+    evaluators = {
+        (v, d): Evaluator(v, d, limiter=limiter, llm=llm, **evaluator_kwargs)
+        for v in versions for d in datasets
+    }
+
+    # One job = one request's worth of cases for one combination
+    per_combo = {
+        combo: [(combo, chunk) for chunk in chunked(cases[combo[1]], max(1, batch_size))]
+        for combo in evaluators
+    }
+    # Stamped as the pool pulls each job, so per-case queue wait is traced
+    jobs = (
+        (*job, time.perf_counter())
+        for round_ in zip_longest(*per_combo.values()) for job in round_ if job
+    )
+    remaining = {combo: len(cases[combo[1]]) for combo in evaluators}
+    rows = {combo: [] for combo in evaluators}
+    outcome = {}
+
+    def score(job):
+        combo, chunk, submitted_at = job
+        ev = evaluators[combo]
+        if batch_size > 1:
+            return combo, ev.score_batch(chunk, submitted_at)
+        return combo, [ev.score(case, submitted_at) for case in chunk]
+
+    start = time.perf_counter()
+    for combo, batch in ordered_map(score, jobs, max_workers):
+        rows[combo].extend(batch)
+        remaining[combo] -= len(batch)
+        if remaining[combo] == 0:
+            ev = evaluators[combo]
+            df = pd.DataFrame(rows.pop(combo))
+            metrics = ev.metrics(df)
+            if log:
+                metrics_logger.log_run(metrics, results=df)
+            outcome[combo] = {"results": df, "metrics": metrics}
+            cascade = (f"escalated={metrics['escalation_rate']:.1%} small_recall={metrics['small_tier_recall']} "
+                       if "escalation_rate" in metrics else "")
+            print(f"   ✅ {combo[0]} × {combo[1]}: recall={metrics['recall']} "
+                  f"hs_recall={metrics['high_severity_recall']} {cascade}"
+                  f"({time.perf_counter() - start:.1f}s)")
+    return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate prompt versions across datasets.")
+    parser.add_argument("--versions", nargs="*", help="prompt versions (default: all in prompts/)")
+    parser.add_argument("--datasets", nargs="*",
+                        help="dataset names (gold, drift) or name=path pairs (default: gold drift)")
+    parser.add_argument("--workers", type=int, default=8, help="max in-flight requests")
+    parser.add_argument("--rps", type=float, default=None, help="global requests-per-second cap")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--compact", action="store_true", default=None,
+                        help="compact verdicts (violation code only)")
+    parser.add_argument("--cascade", action="store_true", default=None,
+                        help="small model first, escalate uncertain cases to the strong model")
+    parser.add_argument("--no-log", action="store_true", help="do not append to eval_log.jsonl")
+    args = parser.parse_args()
+
+    datasets = None
+    if args.datasets:
+        datasets = {}
+        for spec in args.datasets:
+            name, _, path = spec.partition("=")
+            datasets[name] = path or DEFAULT_DATASETS[name]
+
+    run_sweep(args.versions, datasets, max_workers=args.workers, rps=args.rps,
+              batch_size=args.batch_size, log=not args.no_log, compact=args.compact,
+              cascade=args.cascade)
+
+
+if __name__ == "__main__":
+    main()
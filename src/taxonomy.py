@@ -0,0 +1,22 @@
+"""
+src/taxonomy.py
+Loads the machine-readable violation taxonomy (policy/reason_codes.json)
+and exposes a flat violation-code index for downstream lookups.
+"""
+
+import json
+import config
+
+
+def load_taxonomy(path: str = None) -> dict:
+    with open(path or config.REASON_CODES_PATH) as f:
+        return json.load(f)
+
+
+def code_index(taxonomy: dict) -> dict:
+    """Map violation code -> violation entry (category, severity, enforcement, ...)."""
+    return {
+        v["code"]: v
+        for cat in taxonomy["categories"]
+        for v in cat["violations"]
+    }
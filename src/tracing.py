@@ -0,0 +1,142 @@
+"""
+src/tracing.py
+Lightweight per-call timing spans for classification requests.
+
+A Trace collects named spans (build, queue_wait, rate_wait, cache_lookup,
+network, retry_sleep, parse) plus a retry count. Finished traces are
+passed to registered exporters; OtelJsonExporter writes them as
+OpenTelemetry-compatible (OTLP/JSON) span records, one trace per line.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+import config
+
+
+class Trace:
+    def __init__(self, name: str = "classify", **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.trace_id = uuid.uuid4().hex
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter()
+        self.spans = []
+        self.retries = 0
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000, offset_ms=(start - self._t0) * 1000, **attrs)
+
+    def add(self, name: str, duration_ms: float, offset_ms: float = None, **attrs):
+        """Record an already-measured interval (e.g. queue wait before the trace began)."""
+        if offset_ms is None:
+            offset_ms = (time.perf_counter() - self._t0) * 1000 - duration_ms
+        self.spans.append({
+            "name": name,
+            "offset_ms": round(offset_ms, 3),
+            "duration_ms": round(duration_ms, 3),
+            **({"attrs": attrs} if attrs else {}),
+        })
+
+    def stages(self) -> dict:
+        """Total milliseconds per span name."""
+        totals = {}
+        for s in self.spans:
+            totals[s["name"]] = round(totals.get(s["name"], 0.0) + s["duration_ms"], 3)
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "retries": self.retries,
+            "stages": self.stages(),
+            "spans": self.spans,
+        }
+
+
+def to_otel_json(trace: Trace, service_name: str = "llm-risk-agent") -> dict:
+    """Render a Trace as an OTLP/JSON resourceSpans document."""
+    root_id = uuid.uuid4().hex[:16]
+    end_ms = max((s["offset_ms"] + s["duration_ms"] for s in trace.spans), default=0.0)
+    end_ns = trace.start_ns + int(end_ms * 1e6)
+    spans = [{
+        "traceId": trace.trace_id, "spanId": root_id, "name": trace.name,
+        "startTimeUnixNano": str(trace.start_ns), "endTimeUnixNano": str(end_ns),
+        "attributes": _otel_attrs({**trace.attrs, "retries": trace.retries}),
+    }]
+    for s in trace.spans:
+        start_ns = trace.start_ns + int(s["offset_ms"] * 1e6)
+        spans.append({
+            "traceId": trace.trace_id, "spanId": uuid.uuid4().hex[:16], "parentSpanId": root_id,
+            "name": s["name"],
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int(s["duration_ms"] * 1e6)),
+            "attributes": _otel_attrs(s.get("attrs", {})),
+        })
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otel_attrs({"service.name": service_name})},
+        "scopeSpans": [{"scope": {"name": "src.tracing"}, "spans": spans}],
+    }]}
+
+
+def _otel_attrs(attrs: dict) -> list:
+    out = []
+    for k, v in attrs.items():
+        if isinstance(v, bool):
+            value = {"boolValue": v}
+        elif isinstance(v, int):
+            value = {"intValue": str(v)}
+        elif isinstance(v, float):
+            value = {"doubleValue": v}
+        else:
+            value = {"stringValue": str(v)}
+        out.append({"key": k, "value": value})
+    return out
+
+
+class OtelJsonExporter:
+    """Append each finished trace to a JSONL file in OTLP/JSON form."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def __call__(self, trace: Trace):
+        line = json.dumps(to_otel_json(trace))
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+_exporters = []
+
+
+def add_exporter(exporter):
+    """Register a callable(trace) invoked for every finished trace."""
+    _exporters.append(exporter)
+
+
+def clear_exporters():
+    _exporters.clear()
+
+
+def export(trace: Trace):
+    for exporter in _exporters:
+        try:
+            exporter(trace)
+        except Exception as e:  # exporting must never break classification
+            print(f"   ⚠️ Trace export failed: {e}")
+
+
+if config.TRACE_EXPORT_PATH:
+    add_exporter(OtelJsonExporter(os.path.expanduser(config.TRACE_EXPORT_PATH)))
@@ -0,0 +1,18 @@
+"""
+tests/conftest.py
+Every test runs offline against the local simulated provider with no
+injected latency, from the repo root (config paths are relative to it).
+"""
+
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+os.environ.update(LLM_PROVIDER="local", SIM_LATENCY_MS="0", SIM_LATENCY_SIGMA="0",
+                  SIM_MS_PER_OUTPUT_TOKEN="0", LLM_STREAM="0", LLM_CASCADE="0",
+                  LLM_COMPACT_VERDICTS="0", LLM_HEDGE="0")
+os.environ.pop("LLM_FALLBACK_PROVIDER", None)
+os.environ.pop("SIM_RESPONSES_PATH", None)
+os.chdir(ROOT)
+sys.path.insert(0, str(ROOT))
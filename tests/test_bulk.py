@@ -0,0 +1,58 @@
+import json
+import pytest
+from src import bulk
+from src.bulk import plan_shards, score_files
+
+SCAM = "Posting my profits daily. $3,000 today alone. DM for strategy."  # gold: FAKE_PROFIT_EVIDENCE
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(bulk, "MIN_SHARD_BYTES", 64)
+
+
+def _read(path) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_shards_start_on_line_boundaries(tmp_path, small_shards):
+    path = tmp_path / "dump.jsonl"
+    lines = [json.dumps({"id": i, "text": f"post number {i}"}) + "\n" for i in range(50)]
+    path.write_text("".join(lines))
+    shards = plan_shards([str(path)], processes=4)
+    assert len(shards) > 1
+    data = path.read_bytes()
+    assert shards[0][1] == 0 and shards[-1][2] == len(data)
+    for (_, _, end, _), (_, start, _, _) in zip(shards, shards[1:]):
+        assert end == start and data[start - 1:start] == b"\n"
+
+
+def test_malformed_and_non_object_lines_become_error_rows(tmp_path, small_shards):
+    path = tmp_path / "dump.jsonl"
+    records = ['{"id": 0, "text": %s}' % json.dumps(SCAM), "[1, 2]", '"x"', "3", "not json",
+               '{"id": "", "text": "hello"}', '{"id": "no-text"}', '{"text": "no id"}']
+    path.write_text("\n".join(records * 5) + "\n")
+    out = tmp_path / "scored.jsonl"
+
+    stats = score_files([str(path)], str(out), processes=2, workers=2, log=False)
+
+    rows = _read(out)
+    assert stats["rows"] == len(rows) == len(records) * 5
+    assert stats["shards"] > 1
+    assert stats["errors"] == sum("error" in row for row in rows) == 5 * 5
+    first = rows[:len(records)]
+    assert first[0]["id"] == 0 and first[0]["violation"] == "FAKE_PROFIT_EVIDENCE"
+    assert first[5]["id"] == "" and "error" not in first[5]
+    assert all("error" in row for row in first[1:5] + first[6:7])
+    assert first[7]["id"].startswith("dump.jsonl:")
+    assert not list(tmp_path.glob("scored.jsonl.*"))  # parts and temp file cleaned up
+
+
+def test_csv_input_keeps_order(tmp_path):
+    path = tmp_path / "dump.csv"
+    path.write_text("post_id,body\n" + "".join(f"p{i},hello number {i}\n" for i in range(10)))
+    out = tmp_path / "scored.jsonl"
+    score_files([str(path)], str(out), processes=1, workers=4, text_field="body",
+                id_field="post_id", log=False)
+    assert [row["id"] for row in _read(out)] == [f"p{i}" for i in range(10)]
@@ -0,0 +1,59 @@
+import threading
+import time
+from src.concurrency import RateLimiter, chunked, ordered_map
+
+
+def test_ordered_map_keeps_input_order_with_uneven_latency():
+    def slow_for_small(i):
+        time.sleep(0.002 * (10 - i))
+        return i * i
+
+    assert list(ordered_map(slow_for_small, range(10), max_workers=4)) == [i * i for i in range(10)]
+
+
+def test_ordered_map_bounds_in_flight_calls():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work(i):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.005)
+        with lock:
+            active[0] -= 1
+        return i
+
+    assert list(ordered_map(work, range(20), max_workers=3)) == list(range(20))
+    assert peak[0] <= 3
+
+
+def test_ordered_map_reads_input_lazily():
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    results = ordered_map(lambda i: i, items(), max_workers=2)
+    assert next(results) == 0
+    assert len(pulled) <= 2 * 2 + 1
+    results.close()
+
+
+def test_chunked():
+    assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(chunked([], 3)) == []
+
+
+def test_rate_limiter_paces_calls():
+    limiter = RateLimiter(rps=200)
+    start = time.monotonic()
+    for _ in range(11):
+        limiter.acquire()
+    assert time.monotonic() - start >= 10 / 200 * 0.9
+
+
+def test_rate_limiter_disabled():
+    assert RateLimiter(None).acquire() == 0.0
+    assert RateLimiter(0).acquire() == 0.0
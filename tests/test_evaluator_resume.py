@@ -0,0 +1,55 @@
+import json
+import pytest
+from src.evaluator import Evaluator, _truncate_torn_tail
+import config
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "cases.jsonl"
+    with open(config.GOLD_DATA_PATH) as src, open(path, "w") as out:
+        for _, line in zip(range(20), src):
+            out.write(line)
+    return path
+
+
+def _evaluator():
+    return Evaluator("v3_high_recall", rps=0, max_workers=4)
+
+
+@pytest.mark.parametrize("content, expected", [
+    (b'{"id": 1}\n{"id": 2}\n', b'{"id": 1}\n{"id": 2}\n'),
+    (b'{"id": 1}\n{"id": 2}\n{"id": 3, "te', b'{"id": 1}\n{"id": 2}\n'),
+    (b'{"id": 1, "te', b""),
+    (b"", b""),
+])
+def test_truncate_torn_tail(tmp_path, content, expected):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_bytes(content)
+    _truncate_torn_tail(path, block=4)  # small block: the newline search crosses blocks
+    assert path.read_bytes() == expected
+
+
+def test_resume_skips_finished_ids(tmp_path, dataset):
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    first = _evaluator().run(str(dataset), checkpoint_path=str(checkpoint))
+    assert len(first) == 20
+
+    ev = _evaluator()
+    again = ev.run(str(dataset), checkpoint_path=str(checkpoint))
+    assert ev.run_stats["cases"] == 0
+    assert sorted(again["id"]) == sorted(first["id"])
+
+
+def test_resume_rescores_a_torn_last_line(tmp_path, dataset):
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    _evaluator().run(str(dataset), checkpoint_path=str(checkpoint))
+    lines = checkpoint.read_bytes().split(b"\n")
+    checkpoint.write_bytes(b"\n".join(lines[:10]) + b"\n" + lines[10][: len(lines[10]) // 2])
+
+    ev = _evaluator()
+    df = ev.run(str(dataset), checkpoint_path=str(checkpoint))
+    assert ev.run_stats["cases"] == 10
+    assert len(df) == 20 and df["id"].nunique() == 20
+    with open(checkpoint) as f:
+        assert all(json.loads(line) for line in f)  # every line decodes after the append
@@ -0,0 +1,62 @@
+import json
+import pytest
+from src.agent import Agent
+from src.json_stream import JsonObjectScanner, extract_first_object
+from src.llm_client import LLMClient
+import config
+
+VERDICT = ('{"label": 1, "category": "investment_fraud", "violation": "GUARANTEED_RETURN", '
+           '"severity": "high", "enforcement": "remove", "rationale": "Promises {fixed} returns."}')
+
+
+def _feed(scanner: JsonObjectScanner, text: str, size: int = 5):
+    for i in range(0, len(text), size):
+        result = scanner.feed(text[i:i + size])
+        if result is not None:
+            return result
+    return None
+
+
+def test_closes_on_first_object_across_chunks():
+    assert _feed(JsonObjectScanner("{"), f"Sure! {VERDICT} Anything else?") == VERDICT
+
+
+def test_braces_inside_strings_do_not_close():
+    text = '{"rationale": "a } and a \\" quote"}'
+    assert _feed(JsonObjectScanner("{"), text) == text
+
+
+def test_single_item_skips_prose_brackets():
+    assert _feed(JsonObjectScanner("{"), f"Per policy [section 2], verdict: {VERDICT}") == VERDICT
+
+
+def test_undecodable_fragment_is_skipped():
+    batch = '[{"id": "1", "violation": "NONE"}]'
+    assert _feed(JsonObjectScanner("{["), f"See [section 2] first: {batch}") == batch
+    assert _feed(JsonObjectScanner("["), f"See [section 2] first: {batch}") == batch
+
+
+def test_no_verdict_returns_none():
+    scanner = JsonObjectScanner("{")
+    assert _feed(scanner, '{"label": 1, "severity": "hi') is None
+    assert not scanner.done
+
+
+def test_extract_first_object():
+    assert extract_first_object(f"noise {VERDICT} noise") == VERDICT
+    assert extract_first_object("no json here") is None
+
+
+@pytest.fixture
+def recorded(tmp_path, monkeypatch):
+    text = "Guaranteed 10x returns, DM me to join"
+    path = tmp_path / "responses.jsonl"
+    path.write_text(json.dumps({"text": text, "response": f"Per policy [section 2], verdict: {VERDICT}"}) + "\n")
+    monkeypatch.setattr(config, "SIM_RESPONSES_PATH", str(path))
+    return text
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_streamed_and_plain_replies_parse_alike(recorded, stream):
+    out = Agent("v3_high_recall", llm=LLMClient(stream=stream)).classify(recorded)
+    assert (out.violation, out.enforcement) == ("GUARANTEED_RETURN", "remove")
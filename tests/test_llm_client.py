@@ -0,0 +1,58 @@
+import time
+import pytest
+from src.llm_client import CircuitBreaker, DeadlineExceeded, LLMClient
+import config
+
+PROMPT = "Classify.\n\nContent:\nPosting my profits daily. $3,000 today alone. DM for strategy."
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout_s=60)
+    assert [breaker.record_failure() for _ in range(3)] == [False, False, True]
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_breaker_success_resets_the_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=60)
+    breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_breaker_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # one probe at a time
+    assert breaker.record_failure() and breaker.state == "open"  # failed probe re-opens
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_fails_over_and_then_skips_an_open_primary():
+    client = LLMClient(provider="unavailable", fallback=LLMClient(fallback=False))
+    client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=60)
+    responses = [client.complete(PROMPT) for _ in range(4)]
+    assert all(r.failover for r in responses)
+    assert client.stats["failovers"] == 4
+    assert client.stats["breaker_opens"] == 1
+    assert client.breaker.state == "open"
+
+
+def test_without_fallback_errors_propagate():
+    with pytest.raises(ValueError):
+        LLMClient(provider="unavailable", fallback=False).complete(PROMPT)
+
+
+def test_deadline_bounds_the_call(monkeypatch):
+    monkeypatch.setattr(config, "SIM_LATENCY_MS", 300)
+    client = LLMClient(fallback=False)
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        client.complete(PROMPT, deadline_ms=50)
+    assert time.perf_counter() - start < 0.25
+    assert client.stats["deadline_exceeded"] == 1
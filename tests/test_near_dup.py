@@ -0,0 +1,59 @@
+from src.near_dup import NearDuplicateIndex, canonical
+from src.schema import AgentOutput
+
+SCAM = "Posting my profits daily. $3,000 today alone. DM for strategy and join my private group now"
+BENIGN = "Had a lovely walk in the park this morning with the dog, the weather was perfect for it"
+
+
+def _output(label=1, violation="FAKE_PROFIT_EVIDENCE", severity="high", enforcement="remove", source="llm"):
+    return AgentOutput(label=label, domain="financial_integrity",
+                       category="investment_scam" if label else "none", violation=violation,
+                       severity=severity, enforcement=enforcement, rationale="r",
+                       prompt_version="v3_high_recall", latency_ms=1.0, source=source)
+
+
+def test_canonical_collapses_numbers_handles_and_links():
+    assert canonical("Made $3,000 today! DM @trader https://x.io") == canonical("Made $12,500 today!! DM @other www.y.com")
+
+
+def test_reuses_verdict_for_a_near_duplicate():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add(SCAM, _output())
+    out = index.match(SCAM.replace("$3,000", "$4,500").replace("now", "now!!"))
+    assert out is not None and out.source == "near_dup"
+    assert (out.violation, out.enforcement) == ("FAKE_PROFIT_EVIDENCE", "remove")
+
+
+def test_unrelated_post_misses():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add(SCAM, _output())
+    assert index.match(BENIGN) is None
+
+
+def test_benign_reuse_needs_the_stricter_threshold():
+    index = NearDuplicateIndex(threshold=0.5, benign_threshold=0.99)
+    index.add(BENIGN, _output(label=0, violation="NONE", severity="low", enforcement="allow"))
+    assert index.match(BENIGN + " again") is None
+    assert index.match(BENIGN).label == 0
+
+
+def test_most_severe_qualifying_verdict_wins():
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add(SCAM, _output(severity="medium", enforcement="escalate_review", violation="URGENCY_PRESSURE"))
+    index.add(SCAM + " today", _output())
+    assert index.match(SCAM).enforcement == "remove"
+
+
+def test_fail_safe_and_reused_verdicts_are_not_indexed():
+    index = NearDuplicateIndex()
+    index.add(SCAM, _output(violation="PARSE_ERROR", severity="medium", enforcement="escalate_review"))
+    index.add(SCAM, _output(source="rules"))
+    index.add(SCAM, _output(source="near_dup"))
+    assert len(index) == 0
+
+
+def test_oldest_entries_are_evicted():
+    index = NearDuplicateIndex(max_entries=2)
+    for i in range(3):
+        index.add(f"{SCAM} variant {'abcdefghij'[i] * 20}", _output())
+    assert len(index) == 2
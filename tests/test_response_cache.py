@@ -0,0 +1,62 @@
+import time
+from src.agent import Agent
+from src.response_cache import ResponseCache
+
+
+def _cache(tmp_path, **kwargs):
+    return ResponseCache(str(tmp_path / "cache.sqlite"), bypass=False, **kwargs)
+
+
+def test_key_separates_every_part():
+    key = ResponseCache.make_key("anthropic", "m", "t", "prompt")
+    assert key == ResponseCache.make_key("anthropic", "m", "t", "prompt")
+    assert key != ResponseCache.make_key("openai", "m", "t", "prompt")
+    assert key != ResponseCache.make_key("anthropic", "m", "t2", "prompt")
+    # Part boundaries are delimited, so shifting text between parts changes the key
+    assert ResponseCache.make_key("a", "bc", "t", "p") != ResponseCache.make_key("ab", "c", "t", "p")
+
+
+def test_get_put_and_counters(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get("k") is None
+    cache.put("k", '{"label": 0}', 12.5)
+    assert cache.get("k") == ('{"label": 0}', 12.5)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = _cache(tmp_path, max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.put(key, key, 1.0)
+        time.sleep(0.002)
+    cache.get("a")  # "b" is now the least recently used
+    time.sleep(0.002)
+    cache.put("d", "d", 1.0)
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+
+
+def test_evicts_to_byte_budget(tmp_path):
+    cache = _cache(tmp_path, max_bytes=25)
+    for key in ("a", "b", "c"):
+        cache.put(key, "x" * 10, 1.0)
+        time.sleep(0.002)
+    assert cache.stats()["bytes"] <= 25
+    assert cache.get("a") is None
+
+
+def test_bypass_neither_reads_nor_writes(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), bypass=True)
+    cache.put("k", "v", 1.0)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_agent_serves_repeat_prompt_from_cache(tmp_path):
+    agent = Agent("v3_high_recall", cache=_cache(tmp_path))
+    first = agent.classify("Guaranteed 10x returns, DM me to join the signal group")
+    second = agent.classify("Guaranteed 10x returns, DM me to join the signal group")
+    assert agent.stats["llm_calls"] == 1
+    assert second.source == "cache"
+    assert (second.label, second.violation) == (first.label, first.violation)
@@ -0,0 +1,70 @@
+import pytest
+from src.rules import RulesFilter, normalize
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return RulesFilter()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Guarant33d r3turns n0w", "guaranteed returns now"),
+    ("R1sk fr33 1nvestment", "risk free investment"),
+    ("g-u-a-r-a-n-t-e-e-d", "guaranteed"),
+])
+def test_normalize_maps_leet_touching_letters(text, expected):
+    assert normalize(text).strip() == expected
+
+
+@pytest.mark.parametrize("text, kept", [
+    ("Need quick cash!", "cash"),
+    ("Wanna make 5k a week?", "5k"),
+    ("100x incoming", "100x"),
+    ("Send 0.5 BTC", "0.5"),
+])
+def test_normalize_keeps_amounts_and_punctuation(text, kept):
+    assert kept in normalize(text).split()
+
+
+@pytest.mark.parametrize("text, code", [
+    ("Guaranteed returns, risk free", "GUARANTEED_RETURN"),
+    ("R1sk fr33 inv3stment. Guarant33d 5x. DM me", "GUARANTEED_RETURN"),
+    ("100x incoming, coordinated pump starting now", "PUMP_SIGNAL"),
+    ("Pay the upfront fee and your loan is approved", "FAKE_LOAN_OFFER"),
+])
+def test_violation_pattern_short_circuits(rules, text, code):
+    out = rules.match(text)
+    assert out is not None and out.source == "rules"
+    assert (out.label, out.violation) == (1, code)
+
+
+def test_rationale_cites_the_chosen_codes_match(rules):
+    out = rules.match("DM me for guaranteed returns")
+    assert out.violation == "GUARANTEED_RETURN"
+    assert "'guaranteed returns'" in out.rationale
+
+
+def test_benign_context_defers_to_llm(rules):
+    assert rules.match("Warning: anyone promising guaranteed returns is running a scam") is None
+
+
+@pytest.mark.parametrize("text", [
+    "Need quick cash!",
+    "Wanna make 5k a week? Ping me",
+    "Send me a PM for details",
+    "Venmo me and I will send back double",
+    "Cashapp me",
+    "Send BTC and get twice back",
+    "Need someone to receive parcels and forward them",
+    "Grow your wealth with my system",
+    "Nice weather today",
+])
+def test_no_rule_match_goes_to_llm(rules, text):
+    assert rules.match(text) is None
+
+
+def test_benign_allow_is_opt_in():
+    out = RulesFilter(allow_benign=True).match("Nice weather today")
+    assert (out.label, out.enforcement) == (0, "allow")
+    # Money / contact cues still keep a post off the opt-in allow path
+    assert RulesFilter(allow_benign=True).match("Wanna make 5k a week? Ping me") is None
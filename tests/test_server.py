@@ -0,0 +1,78 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.agent import Agent
+from src.server import ClassificationService, serve
+import config
+
+TEXT = "Posting my profits daily. $3,000 today alone. DM for strategy."  # gold: FAKE_PROFIT_EVIDENCE
+
+
+@pytest.fixture
+def slow_provider(monkeypatch):
+    monkeypatch.setattr(config, "SIM_LATENCY_MS", 150)
+
+
+def test_concurrent_identical_requests_share_one_call(slow_provider):
+    service = ClassificationService(Agent("v3_high_recall"), max_concurrency=4, max_queue=8)
+    with ThreadPoolExecutor(6) as pool:
+        outputs = list(pool.map(lambda _: service.classify(TEXT), range(6)))
+    assert service.agent.stats["llm_calls"] == 1
+    assert service.counters["dedup_hits"] == 5
+    assert len({(o.violation, o.enforcement) for o in outputs}) == 1
+
+
+def test_sheds_when_queue_is_full(slow_provider):
+    service = ClassificationService(Agent("v3_high_recall"), max_concurrency=1, max_queue=1)
+    texts = [f"{TEXT} #{i}" for i in range(6)]
+    with ThreadPoolExecutor(6) as pool:
+        outputs = list(pool.map(service.classify, texts))
+    shed = [o for o in outputs if o.source == "shed"]
+    assert shed and len(shed) == service.counters["shed"]
+    # Shedding fails safe: escalate, never allow
+    assert all((o.label, o.enforcement) == (1, "escalate_review") for o in shed)
+
+
+def test_unmeetable_deadline_sheds(slow_provider):
+    service = ClassificationService(Agent("v3_high_recall"))
+    service.classify(TEXT)  # warm the latency estimate
+    assert service.classify(TEXT + " again", deadline_ms=5).source == "shed"
+
+
+@pytest.fixture
+def url():
+    server = serve(ClassificationService(Agent("v3_high_recall")), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/classify"
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url: str, body) -> tuple:
+    request = urllib.request.Request(url, json.dumps(body).encode(), {"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_classify_endpoint(url):
+    status, body = _post(url, {"text": TEXT, "deadline_ms": 5000})
+    assert status == 200 and body["violation"] == "FAKE_PROFIT_EVIDENCE"
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    [TEXT],
+    {"text": TEXT, "deadline_ms": "soon"},
+    {"text": TEXT, "deadline_ms": -5},
+    {"text": TEXT, "deadline_ms": 0},
+    {"text": TEXT, "deadline_ms": True},
+])
+def test_bad_requests_get_400(url, body):
+    status, payload = _post(url, body)
+    assert status == 400 and "error" in payload